@@ -0,0 +1,79 @@
+"""
+Conditional GET helpers: strong ETags, If-None-Match / If-Modified-Since and Cache-Control
+
+Routes compute a cheap version (a cache version or an updated_at maximum) before
+loading or serializing anything; a matching client copy gets an empty 304.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Cache-Control policies per kind of resource
+CACHE_PUBLIC_CATALOG = "public, max-age=10, must-revalidate"   # menu: shared, rarely changes
+CACHE_LIVE = "no-cache"                                          # table board: always revalidate
+CACHE_PRIVATE_LIVE = "private, no-cache"                         # per-user data (orders)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the version parts of a representation"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2)
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """Set validators on ``response``; return a 304 if the client's copy is current.
+
+    Usage in a route (before loading data)::
+
+        not_modified = conditional_response(request, response, etag, CACHE_LIVE)
+        if not_modified:
+            return not_modified
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -1,8 +1,10 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.database import get_db, get_async_db
+from app.core.principal_cache import principal_cache
 from app.core.security import verify_token
 from app.crud.user import user as user_crud
 from app.models.user import User, UserRole
@@ -11,6 +13,24 @@ from app.models.user import User, UserRole
 security = HTTPBearer()
 
 
+def _load_user(db: Session, username: str) -> Optional[User]:
+    """Resolve the token subject to a User bound to ``db``, from principal_cache when possible.
+
+    A cache hit issues no query: the snapshot is attached to the session as a
+    persistent instance, so routes can still pass it to CRUD updates.
+    """
+    snapshot = principal_cache.get(username) if principal_cache.enabled else None
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = user_crud.get_by_username(db, username=username)
+    if user is not None:
+        principal_cache.put(user)
+    return user
+
+
 def get_current_user(
     db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -26,7 +46,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = user_crud.get_by_username(db, username=username)
+    user = _load_user(db, username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,7 +122,7 @@ def get_current_user_optional(
         if username is None:
             return None
         
-        user = user_crud.get_by_username(db, username=username)
+        user = _load_user(db, username)
         if user is None or not user_crud.is_active(user):
             return None
         
@@ -144,7 +164,7 @@ def get_current_user_or_rasa(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        user = user_crud.get_by_username(db, username=username)
+        user = _load_user(db, username)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -166,4 +186,69 @@ def get_current_user_or_rasa(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+# Async variants for routes running on the async engine (see get_async_db)
+async def get_current_user_optional_async(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Optional[User]:
+    """Async version of get_current_user_optional"""
+    if not credentials:
+        return None
+    
+    try:
+        username = verify_token(credentials.credentials)
+        
+        if username is None:
+            return None
+        
+        user = await db.run_sync(_load_user, username)
+        if user is None or not user_crud.is_active(user):
+            return None
+        
+        return user
+    except:
+        return None
+
+
+async def get_current_user_or_rasa_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Optional[User]:
+    """Async version of get_current_user_or_rasa"""
+    if request.headers.get("X-Rasa-Request") == "true":
+        return None
+    
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    username = verify_token(credentials.credentials)
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user = await db.run_sync(_load_user, username)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not user_crud.is_active(user):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
+    return user
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.api.deps import get_current_user, get_current_staff_user
 from app.services.customer_arrival_tracker import create_arrival_tracker, ArrivalRecord
 from pydantic import BaseModel
@@ -100,7 +100,7 @@ def check_for_no_shows(
 @router.get("/statistics", response_model=ArrivalStatistics)
 def get_arrival_statistics(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date: Optional[datetime] = Query(None, description="Start date for statistics"),
     end_date: Optional[datetime] = Query(None, description="End date for statistics"),
     current_user = Depends(get_current_staff_user),
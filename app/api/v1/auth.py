@@ -2,10 +2,10 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import create_access_token
+from app.core.database import get_async_db
+from app.core.security import aget_password_hash, averify_and_update_password, create_access_token
 from app.core.config import settings
 from app.crud.user import user as user_crud
 from app.schemas.user import Token, UserCreate
@@ -16,23 +16,25 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=Token)
-def register(
+async def register(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserCreate,
 ) -> Any:
     """
-    Register new user (customer role only)
+    Register new user (customer role only).
+    The password is hashed in the hasher pool while this request awaits it,
+    so a registration burst holds no threadpool threads.
     """
     # Check if user already exists
-    existing_user = user_crud.get_by_email(db, email=user_in.email)
+    existing_user = await db.run_sync(user_crud.get_by_email, email=user_in.email)
     if existing_user:
         raise HTTPException(
             status_code=400,
             detail="A user with this email already exists"
         )
     
-    existing_user = user_crud.get_by_username(db, username=user_in.username)
+    existing_user = await db.run_sync(user_crud.get_by_username, username=user_in.username)
     if existing_user:
         raise HTTPException(
             status_code=400,
@@ -42,7 +44,8 @@ def register(
     # Ensure only customer role can be created through public registration
     user_in.role = UserRole.customer
     
-    user = user_crud.create(db, obj_in=user_in)
+    hashed_password = await aget_password_hash(user_in.password)
+    user = await db.run_sync(user_crud.create, obj_in=user_in, hashed_password=hashed_password)
     
     # Create access token for immediate login
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -58,16 +61,22 @@ def register(
 
 
 @router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(get_db),
+async def login(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests.
+    Same steps as user_crud.authenticate, but the password check is awaited
+    (hasher pool) instead of blocking a threadpool thread.
     """
-    user = user_crud.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
+    user = await db.run_sync(user_crud.get_by_username, username=form_data.username)
+    if user:
+        verified, new_hash = await averify_and_update_password(form_data.password, user.hashed_password)
+        if not verified:
+            user = None
+        elif new_hash:
+            user = await db.run_sync(user_crud.store_rehashed_password, db_obj=user, hashed_password=new_hash)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
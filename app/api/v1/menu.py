@@ -1,22 +1,42 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, get_async_read_db
+from app.core.menu_cache import MenuCatalog, menu_catalog
 from app.crud.menu import category as category_crud, menu_item as menu_item_crud
+from app.crud.pagination import CountMode, keyset_slice, next_cursor
 from app.schemas.menu import (
     Category, CategoryCreate, CategoryUpdate, CategoryWithItems,
-    MenuItem, MenuItemCreate, MenuItemUpdate, PaginatedMenuResponse, PaginatedCategoryResponse
+    MenuItem, MenuItemCreate, MenuItemUpdate, MenuItemSearchResult, PaginatedMenuResponse, PaginatedCategoryResponse
 )
-from app.api.deps import get_current_staff_user, get_current_user_optional
+from app.api.conditional import CACHE_PUBLIC_CATALOG, conditional_response, make_etag
+from app.api.deps import get_current_staff_user, get_current_user_optional, get_current_user_optional_async
 
 router = APIRouter()
 
 
+def _menu_item_key(item: dict) -> tuple:
+    # Catalog items are ordered like CRUDMenuItem.get_multi: (name, id)
+    return item["name"], item["id"]
+
+
+def _catalog_not_modified(request: Request, response: Response, catalog: MenuCatalog) -> Optional[Response]:
+    """304 when the client already has this URL at the current catalog version"""
+    if catalog.version <= 0:
+        return None
+    etag = make_etag("menu", catalog.version, request.url.path, request.url.query)
+    return conditional_response(request, response, etag, CACHE_PUBLIC_CATALOG)
+
+
 # Category endpoints
 @router.get("/categories/", response_model=PaginatedCategoryResponse)
-def read_categories(
-    db: Session = Depends(get_db),
+async def read_categories(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
     q: Optional[str] = Query(None, description="Search query"),
@@ -24,31 +44,50 @@ def read_categories(
     # current_user = Depends(get_current_user_optional),  # Tạm disable auth
 ) -> Any:
     """
-    Retrieve categories with pagination and search.
+    Retrieve categories with pagination and search (served from the menu catalog cache).
     """
-    categories = category_crud.get_multi_with_search(
-        db, skip=skip, limit=limit, search=q, active_only=active_only
-    )
-    total = category_crud.count_with_search(db, search=q, active_only=active_only)
+    catalog = await db.run_sync(menu_catalog.get)
+    not_modified = _catalog_not_modified(request, response, catalog)
+    if not_modified:
+        return not_modified
+    categories = catalog.filter_categories(search=q, active_only=active_only)
     
     return PaginatedCategoryResponse(
-        items=categories,
-        total=total,
+        items=categories[skip:skip + limit],
+        total=len(categories),
         skip=skip,
         limit=limit
     )
 
 
 @router.get("/categories/with-items", response_model=List[CategoryWithItems])
-def read_categories_with_items(
-    db: Session = Depends(get_db),
+async def read_categories_with_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    available_only: bool = Query(True, description="Include only available items"),
     # current_user = Depends(get_current_user_optional),  # Tạm disable auth
 ) -> Any:
     """
-    Retrieve categories with their menu items.
+    Retrieve active categories with their menu items.
+    Served from a pre-serialized snapshot rebuilt only when the menu version changes.
     """
-    categories = category_crud.get_multi(db, active_only=True)
-    return categories
+    if not settings.MENU_TREE_SNAPSHOT:
+        def _load(sync_db: Session) -> List[CategoryWithItems]:
+            categories = category_crud.get_multi_with_items(sync_db, active_only=True, available_only=available_only)
+            return [CategoryWithItems.from_orm(category) for category in categories]
+        
+        return await db.run_sync(_load)
+    
+    catalog = await db.run_sync(menu_catalog.get)
+    not_modified = _catalog_not_modified(request, response, catalog)
+    if not_modified:
+        return not_modified
+    return Response(
+        content=catalog.categories_with_items_json(active_only=True, available_only=available_only),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
 
 
 @router.post("/categories/", response_model=Category)
@@ -83,7 +122,7 @@ def read_category(
     """
     Get category by ID.
     """
-    category = category_crud.get(db, id=category_id)
+    category = menu_catalog.get(db).get_category(category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
@@ -145,8 +184,10 @@ def delete_category(
 
 # Menu Item endpoints
 @router.get("/items/", response_model=PaginatedMenuResponse)
-def read_menu_items(
-    db: Session = Depends(get_db),
+async def read_menu_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
     available_only: bool = Query(True, description="Filter only available items"),
@@ -154,50 +195,79 @@ def read_menu_items(
     q: Optional[str] = Query(None, description="Search term for item name"),
     is_featured: Optional[bool] = Query(None, description="Filter by featured status"),
     is_available: Optional[bool] = Query(None, description="Filter by availability status"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: CountMode = Query(CountMode.exact, description="Total: exact, estimate or none (estimate is exact here)"),
     # current_user = Depends(get_current_user_optional),  # Tạm disable auth
 ) -> Any:
     """
-    Retrieve menu items with pagination and search.
+    Retrieve menu items with pagination and search (served from the menu catalog cache).
     """
-    # Get total count with filters applied
-    total = menu_item_crud.get_count(
-        db, available_only=available_only, category_id=category_id, search_term=q,
-        is_featured=is_featured, is_available=is_available
-    )
-    
-    # Get items with pagination
-    items = menu_item_crud.get_multi(
-        db, skip=skip, limit=limit, 
-        available_only=available_only, 
+    catalog = await db.run_sync(menu_catalog.get)
+    not_modified = _catalog_not_modified(request, response, catalog)
+    if not_modified:
+        return not_modified
+    items = catalog.filter_items(
+        available_only=available_only,
         category_id=category_id,
         search_term=q,
         is_featured=is_featured,
         is_available=is_available
     )
+    # Filtering is in memory, so an exact total is free; none only trims the response
+    total = None if count == CountMode.none else len(items)
     
     # Calculate pagination info
-    pages = (total + limit - 1) // limit if limit > 0 else 1
+    pages = None if total is None else (total + limit - 1) // limit if limit > 0 else 1
     page = skip // limit if limit > 0 else 0
     
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "size": limit,
-        "pages": pages
-    }
+    page_items = keyset_slice(items, cursor, limit, key=_menu_item_key) if cursor else items[skip:skip + limit]
+    
+    return PaginatedMenuResponse(
+        items=page_items,
+        total=total,
+        page=page,
+        size=limit,
+        pages=pages,
+        next_cursor=next_cursor(page_items, limit, key=_menu_item_key)
+    )
 
 
 @router.get("/items/featured", response_model=List[MenuItem])
-def read_featured_items(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user_optional),
+async def read_featured_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_optional_async),
 ) -> Any:
     """
     Retrieve featured menu items.
     """
-    items = menu_item_crud.get_featured(db)
-    return items
+    catalog = await db.run_sync(menu_catalog.get)
+    not_modified = _catalog_not_modified(request, response, catalog)
+    if not_modified:
+        return not_modified
+    return catalog.featured_items()
+
+
+@router.get("/items/search", response_model=List[MenuItemSearchResult])
+async def search_menu_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    q: str = Query(..., min_length=1, max_length=100, description="Search text, accents optional (e.g. 'pho bo')"),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    available_only: bool = Query(True, description="Filter only available items"),
+) -> Any:
+    """
+    Ranked menu search, tolerant of missing Vietnamese diacritics and small typos.
+    """
+    catalog = await db.run_sync(menu_catalog.get)
+    not_modified = _catalog_not_modified(request, response, catalog)
+    if not_modified:
+        return not_modified
+    results = catalog.search(q, limit=limit, available_only=available_only, category_id=category_id)
+    return [{**item, "score": score} for item, score in results]
 
 @router.post("/items/", response_model=MenuItem)
 def create_menu_item(
@@ -236,7 +306,7 @@ def read_menu_item(
     """
     Get menu item by ID.
     """
-    item = menu_item_crud.get(db, id=item_id)
+    item = menu_catalog.get(db).get_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Menu item not found")
     return item
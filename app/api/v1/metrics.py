@@ -0,0 +1,112 @@
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.availability import table_availability
+from app.core.config import settings
+from app.core.database import get_db, read_router
+from app.core.idempotency import idempotency_store
+from app.core.menu_cache import menu_catalog
+from app.core.password_hasher import password_hasher
+from app.core.pool_metrics import all_pool_metrics
+from app.core.principal_cache import principal_cache
+from app.core.rollups import sales_rollups
+from app.core.snapshot_cache import dashboard_stats_snapshot
+from app.api.deps import get_current_staff_user
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+def get_db_pool_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Connection pool metrics per engine (Staff+ only).
+    """
+    return {
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING,
+        },
+        "pools": all_pool_metrics(),
+        "replicas": read_router.status(),
+    }
+
+
+@router.get("/principal-cache")
+def get_principal_cache_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Authenticated-user cache hit/miss counters (Staff+ only).
+    """
+    return principal_cache.stats()
+
+
+@router.get("/password-hasher")
+def get_password_hasher_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Password hashing pool in-flight/queue-depth counters (Staff+ only).
+    """
+    return password_hasher.stats()
+
+
+@router.get("/idempotency")
+def get_idempotency_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Idempotency-Key claim/replay/conflict counters for this worker (Staff+ only).
+    """
+    return idempotency_store.stats()
+
+
+@router.get("/menu-cache")
+def get_menu_cache_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Menu catalog cache version and hit/load counters (Staff+ only).
+    """
+    return menu_catalog.stats()
+
+
+@router.get("/dashboard-snapshot")
+def get_dashboard_snapshot_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Dashboard stats snapshot age and hit/load/wait counters for this worker (Staff+ only).
+    """
+    return dashboard_stats_snapshot.stats()
+
+
+@router.get("/sales-rollups")
+def get_sales_rollup_metrics(
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Sales rollup catch-up age and counters for this worker (Staff+ only).
+    """
+    return sales_rollups.stats()
+
+
+@router.get("/table-availability")
+def get_table_availability_metrics(
+    db: Session = Depends(get_db),
+    verify: bool = Query(False, description="Compare the index with the database first"),
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Availability index window, hit/fallback counters and drift for this worker (Staff+ only).
+    """
+    result = table_availability.stats()
+    if verify:
+        result["verify"] = table_availability.verify(db)
+    return result
@@ -1,22 +1,38 @@
 from typing import Any, List, Optional
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, get_read_db, read_router
 from app.crud.order import order as order_crud, reservation as reservation_crud
 from app.crud.table import table as table_crud
+from app.crud.pagination import CountMode, next_cursor
 from app.crud.menu import menu_item as menu_item_crud
 from app.schemas.order import (
-    Order, OrderCreate, OrderUpdate, ReservationCreate, ReservationUpdate, ReservationWithDetails,
+    Order, OrderCreate, OrderUpdate, OrderItemOp, OrderItemOperation, ReservationCreate, ReservationUpdate, ReservationWithDetails,
     OrderSummary, DashboardStats, PaginatedReservationResponse, PaginatedOrderResponse
 )
 from app.models.order import OrderStatus, PaymentStatus, ReservationStatus, OrderItem, Order as OrderModel
 from app.models.menu import MenuItem
 from app.models.user import UserRole
-from app.api.deps import get_current_user, get_current_staff_user, get_current_user_optional, get_current_user_or_rasa
+from app.api.conditional import CACHE_PRIVATE_LIVE, conditional_response, make_etag
+from app.api.export import ExportFormat, export_response
+from app.core.menu_cache import menu_catalog
+from app.core.rollups import sales_rollups
+from app.core.snapshot_cache import dashboard_stats_snapshot
+from app.crud.filters import restaurant_today
+from app.crud.rollup import sales_rollup
+from app.api.deps import (
+    get_current_user, get_current_staff_user, get_current_user_optional, get_current_user_or_rasa,
+    get_current_user_optional_async, get_current_user_or_rasa_async
+)
 router = APIRouter()
+# Orders whose lines can still change: closed (completed / cancelled) orders are frozen
+MODIFIABLE_ORDER_STATUSES = (
+    OrderStatus.pending, OrderStatus.confirmed, OrderStatus.preparing, OrderStatus.ready, OrderStatus.served
+)
 # Reservation endpoints
 @router.get("/reservations/", response_model=PaginatedReservationResponse)
 def read_reservations(
@@ -25,25 +41,24 @@ def read_reservations(
     limit: int = 100,
     status: Optional[ReservationStatus] = Query(None, description="Filter by status"),
     date_filter: Optional[date] = Query(None, description="Filter by date"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: CountMode = Query(CountMode.exact, description="Total: exact, estimate (planner) or none"),
     current_user = Depends(get_current_staff_user),
 ) -> Any:
     """
     Retrieve reservations with pagination and optional filtering.
     """
-    # Get total count with filters applied
-    total = reservation_crud.get_count_with_details(
-        db, status=status, date_filter=date_filter
-    )
-    
-    # Get reservations with pagination
-    reservations = reservation_crud.get_multi_with_details(
+    # Page and total in one query
+    reservations, total = reservation_crud.get_page_with_details(
         db, skip=skip, limit=limit, 
         status=status, 
-        date_filter=date_filter
+        date_filter=date_filter,
+        cursor=cursor,
+        count=count
     )
     
     # Calculate pagination info
-    pages = (total + limit - 1) // limit if limit > 0 else 1
+    pages = None if total is None else (total + limit - 1) // limit if limit > 0 else 1
     page = skip // limit if limit > 0 else 0
     
     return PaginatedReservationResponse(
@@ -51,14 +66,15 @@ def read_reservations(
         total=total,
         page=page,
         size=limit,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor(reservations, limit, key=lambda r: (r["created_at"], r["id"]))
     )
 @router.get("/reservations/my", response_model=List[ReservationWithDetails])
-def read_my_reservations(
-    db: Session = Depends(get_db),
+async def read_my_reservations(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user = Depends(get_current_user_or_rasa),
+    current_user = Depends(get_current_user_or_rasa_async),
 ) -> Any:
     """
     Retrieve current user's reservations with table details.
@@ -68,11 +84,28 @@ def read_my_reservations(
         # Rasa request or no user - return empty list
         return []
         
-    reservations = reservation_crud.get_my_reservations_with_details(
-        db, customer_id=current_user.id, skip=skip, limit=limit
+    reservations = await db.run_sync(
+        reservation_crud.get_my_reservations_with_details,
+        customer_id=current_user.id, skip=skip, limit=limit
     )
     
     return reservations
+@router.get("/reservations/export")
+def export_reservations(
+    *,
+    start_date: date = Query(..., description="First reservation date (restaurant-local)"),
+    end_date: date = Query(..., description="Last reservation date, inclusive"),
+    format: ExportFormat = Query(ExportFormat.csv, description="csv or ndjson"),
+    status: Optional[ReservationStatus] = Query(None, description="Filter by status"),
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Stream reservations booked for a date range as CSV or NDJSON (Staff+ only).
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    statement = reservation_crud.export_statement(start_date, end_date, status=status)
+    return export_response(read_router.session, statement, format, f"reservations_{start_date}_{end_date}")
 @router.post("/reservations/", response_model=ReservationWithDetails)
 def create_reservation(
     *,
@@ -235,29 +268,29 @@ def read_orders(
     status: Optional[OrderStatus] = Query(None, description="Filter by status"),
     date_filter: Optional[date] = Query(None, description="Filter by date"),
     search: Optional[str] = Query(None, description="Search by order number, customer name, or table number"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces skip)"),
+    count: CountMode = Query(CountMode.exact, description="Total: exact, estimate (planner) or none"),
     current_user = Depends(get_current_staff_user),
 ) -> Any:
     """
     Retrieve orders with pagination and customer/table details (Staff+ only).
     """
-    # Get total count with filters applied
-    total = order_crud.get_count_with_details(
-        db, status=status, date_filter=date_filter, search=search
-    )
-    
-    # Get orders with pagination
-    orders = order_crud.get_multi_with_details(
+    # Page and total in one query
+    orders, total = order_crud.get_page_with_details(
         db, skip=skip, limit=limit, 
         status=status, 
         date_filter=date_filter,
-        search=search
+        search=search,
+        cursor=cursor,
+        count=count
     )
     
     return PaginatedOrderResponse(
         items=orders,
         total=total,
         skip=skip,
-        limit=limit
+        limit=limit,
+        next_cursor=next_cursor(orders, limit, key=lambda o: (o["created_at"], o["id"]))
     )
 @router.get("/orders/my", response_model=List[Order])
 def read_my_orders(
@@ -275,11 +308,11 @@ def read_my_orders(
     )
     return orders
 @router.post("/orders/", response_model=Order)
-def create_order(
+async def create_order(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     order_in: OrderCreate,
-    current_user = Depends(get_current_user_optional),
+    current_user = Depends(get_current_user_optional_async),
 ) -> Any:
     """
     Create new order.
@@ -295,14 +328,14 @@ def create_order(
         print(f"🔍 Debug: Order input data: {order_in}")
         print(f"🔍 Debug: Order items: {order_in.order_items}")
         
-        # Validate that all menu items exist and are available
-        from app.crud.menu import menu_item as menu_item_crud
-        for item in order_in.order_items:
-            # Handle both dict and object formats
-            menu_item_id = item.get('menu_item_id') if isinstance(item, dict) else item.menu_item_id
-            print(f"🔍 Debug: Validating menu item {menu_item_id}")
-            
-            menu_item = menu_item_crud.get(db, id=menu_item_id)
+        # Validate that all menu items exist and are available (one IN (...) query; reused for pricing)
+        menu_item_ids = [
+            item.get('menu_item_id') if isinstance(item, dict) else item.menu_item_id
+            for item in order_in.order_items
+        ]
+        menu_items = await db.run_sync(menu_item_crud.get_many, ids=menu_item_ids)
+        for menu_item_id in menu_item_ids:
+            menu_item = menu_items.get(menu_item_id)
             if not menu_item:
                 raise HTTPException(
                     status_code=400, 
@@ -313,12 +346,12 @@ def create_order(
                     status_code=400, 
                     detail=f"Menu item '{menu_item.name}' is not available"
                 )
-            print(f"✅ Menu item {menu_item.name} is valid")
         
-        print(f"🔍 Debug: All items valid, creating order...")
-        order = order_crud.create(db, obj_in=order_in)
+        print(f"🔍 Debug: All {len(menu_item_ids)} items valid, creating order...")
+        order = await db.run_sync(order_crud.create, obj_in=order_in, menu_items=menu_items)
         print(f"✅ Order created successfully: {order.id}")
-        return order
+        # Reload with items eagerly joined; lazy loads can't run during serialization
+        return await db.run_sync(order_crud.get, id=order.id)
     
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -336,23 +369,36 @@ def create_order(
 @router.get("/orders/{order_id}", response_model=Order)
 def read_order(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     order_id: int,
     current_user = Depends(get_current_user),
 ) -> Any:
     """
     Get order by ID.
+    Supports If-None-Match: pollers (e.g. payment status) get 304 until the order changes.
     """
-    order = order_crud.get(db, id=order_id)
-    if not order:
+    version = order_crud.get_version(db, id=order_id)
+    if not version:
         raise HTTPException(status_code=404, detail="Order not found")
+    customer_id, last_modified, fingerprint = version
     
     # Users can only see their own orders unless they are staff+
     from app.models.user import UserRole
     if (current_user.role == UserRole.customer and 
-        order.customer_id != current_user.id):
+        customer_id != current_user.id):
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
+    # Lines embed menu item details, so the menu version is part of the ETag
+    etag = make_etag("order", order_id, fingerprint, menu_catalog.get(db).version)
+    not_modified = conditional_response(request, response, etag, CACHE_PRIVATE_LIVE, last_modified)
+    if not_modified:
+        return not_modified
+    
+    order = order_crud.get(db, id=order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
     return order
 @router.get("/orders/{order_id}/details")
 def read_order_details(
@@ -409,6 +455,23 @@ def update_order(
     
     order = order_crud.update(db, db_obj=order, obj_in=order_in)
     return order
+@router.get("/export")
+def export_orders(
+    *,
+    start_date: date = Query(..., description="First order date (restaurant-local)"),
+    end_date: date = Query(..., description="Last order date, inclusive"),
+    format: ExportFormat = Query(ExportFormat.csv, description="csv or ndjson"),
+    status: Optional[OrderStatus] = Query(None, description="Filter by status"),
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Stream orders created in a date range as CSV or NDJSON (Staff+ only).
+    Rows come from a server-side cursor on the read replica and are written out batch by batch.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    statement = order_crud.export_statement(start_date, end_date, status=status)
+    return export_response(read_router.session, statement, format, f"orders_{start_date}_{end_date}")
 @router.get("/summary/daily", response_model=OrderSummary)
 def get_daily_summary(
     *,
@@ -419,23 +482,51 @@ def get_daily_summary(
     """
     Get daily order summary (Staff+ only).
     """
+    sales_rollups.ensure_fresh()
     summary = order_crud.get_daily_summary(db, target_date=target_date)
     return summary
+@router.get("/summary/hourly")
+def get_hourly_summary(
+    *,
+    db: Session = Depends(get_read_db),
+    target_date: Optional[date] = Query(None, description="Date to get hourly figures for (default: today)"),
+    current_user = Depends(get_current_staff_user),
+) -> Any:
+    """
+    Orders and revenue per hour of one day, from the sales rollup (Staff+ only).
+    """
+    sales_rollups.ensure_fresh()
+    day = target_date or restaurant_today()
+    return [
+        {
+            "hour": row.hour,
+            "order_count": row.order_count,
+            "completed_count": row.completed_count,
+            "completed_revenue": row.completed_revenue,
+            "paid_count": row.paid_count,
+            "paid_revenue": row.paid_revenue,
+        }
+        for row in sales_rollup.hourly(db, day)
+    ]
 @router.get("/dashboard/stats", response_model=DashboardStats)
 def get_dashboard_stats(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_staff_user),
 ) -> Any:
     """
     Get comprehensive dashboard statistics (Staff+ only).
+    Served from a shared snapshot refreshed at most every DASHBOARD_STATS_TTL_SECONDS.
     """
-    stats = order_crud.get_dashboard_stats(db)
+    def load_stats():
+        sales_rollups.ensure_fresh()
+        return order_crud.get_dashboard_stats(db)
+    stats = dashboard_stats_snapshot.get(load_stats)
     return stats
 @router.get("/analytics/bestsellers")
 def get_bestseller_dishes(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = Query(10, description="Number of bestseller dishes to return"),
     days: int = Query(30, description="Number of days to analyze"),
     current_user = Depends(get_current_user_optional),
@@ -444,28 +535,10 @@ def get_bestseller_dishes(
     Get bestseller dishes based on order quantity in the specified period.
     """
     
-    # Calculate date range
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # Query to get bestsellers
-    bestsellers = (
-        db.query(
-            OrderItem.menu_item_id,
-            func.sum(OrderItem.quantity).label('total_quantity'),
-            func.count(OrderItem.id).label('order_count')
-        )
-        .join(OrderModel, OrderItem.order_id == OrderModel.id)
-        .filter(
-            OrderModel.created_at >= start_date,
-            OrderModel.created_at <= end_date,
-            OrderModel.status.in_([OrderStatus.completed, OrderStatus.preparing, OrderStatus.ready])
-        )
-        .group_by(OrderItem.menu_item_id)
-        .order_by(func.sum(OrderItem.quantity).desc())
-        .limit(limit)
-        .all()
-    )
+    # Whole restaurant-local days from the per-item daily rollup: cost grows with days, not orders
+    sales_rollups.ensure_fresh()
+    end_day = restaurant_today()
+    bestsellers = sales_rollup.bestsellers(db, start_day=end_day - timedelta(days=days), end_day=end_day, limit=limit)
     
     # Format response
     result = []
@@ -478,26 +551,23 @@ def get_bestseller_dishes(
     
     return result
 @router.post("/orders/{order_id}/items/")
-def add_item_to_order(
+async def add_item_to_order(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     order_id: int,
     item_data: dict,
-    current_user = Depends(get_current_user_optional),
+    current_user = Depends(get_current_user_optional_async),
 ) -> Any:
     """
     Add item to existing order.
     """
     try:
-    
-    
-        
         print(f"🔍 Debug: Add item to order - order_id={order_id}")
         print(f"🔍 Debug: Item data: {item_data}")
         print(f"🔍 Debug: Current user: {current_user.id if current_user else 'Anonymous'}")
         
         # Get order
-        order = order_crud.get(db, id=order_id)
+        order = await db.run_sync(order_crud.get, id=order_id)
         if not order:
             print(f"❌ Order {order_id} not found")
             raise HTTPException(status_code=404, detail="Order not found")
@@ -505,7 +575,6 @@ def add_item_to_order(
         print(f"✅ Order found: {order.order_number}, customer_id={order.customer_id}")
         
         # Users can only modify their own orders unless they are staff+
-    
         if (current_user and current_user.role == UserRole.customer and 
             order.customer_id != current_user.id):
             print(f"❌ Permission denied: user {current_user.id} cannot modify order of customer {order.customer_id}")
@@ -518,7 +587,7 @@ def add_item_to_order(
         
         print(f"🔍 Debug: Validating menu item {menu_item_id}")
         
-        menu_item = menu_item_crud.get(db, id=menu_item_id)
+        menu_item = await db.run_sync(menu_item_crud.get, id=menu_item_id)
         if not menu_item:
             print(f"❌ Menu item {menu_item_id} not found")
             raise HTTPException(status_code=400, detail="Menu item not found")
@@ -528,44 +597,20 @@ def add_item_to_order(
         
         print(f"✅ Menu item valid: {menu_item.name} (price: {menu_item.price})")
         
-        # Check if item already exists in order
-        existing_item = db.query(OrderItem).filter(
-            OrderItem.order_id == order_id,
-            OrderItem.menu_item_id == menu_item_id
-        ).first()
+        item_id, new_quantity, created = await db.run_sync(
+            order_crud.add_item,
+            order_id=order_id,
+            menu_item=menu_item,
+            quantity=quantity,
+            special_instructions=special_instructions
+        )
         
-        if existing_item:
-            print(f"🔍 Debug: Item already exists in order, updating quantity")
-            # Update quantity
-            existing_item.quantity += quantity
-            existing_item.total_price = existing_item.quantity * existing_item.unit_price
-            db.commit()
-            db.refresh(existing_item)
-            print(f"✅ Item quantity updated: {menu_item.name} x{existing_item.quantity}")
-            return {"message": "Item quantity updated", "item_id": existing_item.id}
-        else:
-            print(f"🔍 Debug: Creating new order item")
-            # Create new order item
-            new_item = OrderItem(
-                order_id=order_id,
-                menu_item_id=menu_item_id,
-                quantity=quantity,
-                unit_price=menu_item.price,
-                total_price=menu_item.price * quantity,
-                special_instructions=special_instructions
-            )
-            db.add(new_item)
-            db.commit()
-            db.refresh(new_item)
-            
-            print(f"✅ New order item created: {menu_item.name} x{quantity}")
-            
-            # Update order total
-            order_crud.update_order_total(db, order_id=order_id)
-            
-            print(f"✅ Order total updated")
-            
-            return {"message": "Item added successfully", "item_id": new_item.id}
+        if not created:
+            print(f"✅ Item quantity updated: {menu_item.name} x{new_quantity}")
+            return {"message": "Item quantity updated", "item_id": item_id}
+        
+        print(f"✅ New order item created: {menu_item.name} x{quantity}")
+        return {"message": "Item added successfully", "item_id": item_id}
     
     except HTTPException:
         raise
@@ -581,6 +626,57 @@ def add_item_to_order(
         )
 
 
+@router.patch("/orders/{order_id}/items", response_model=Order)
+async def update_order_items(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    order_id: int,
+    operations: List[OrderItemOperation],
+    current_user = Depends(get_current_user_optional_async),
+) -> Any:
+    """
+    Apply a batch of add / set_quantity / remove steps to an order's items in one
+    transaction and return the updated order.
+    """
+    order = await db.run_sync(order_crud.get, id=order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    # Users can only modify their own orders unless they are staff+
+    if (current_user and current_user.role == UserRole.customer and 
+        order.customer_id != current_user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    # Check if order can still be modified (not closed, not paid)
+    if order.status not in MODIFIABLE_ORDER_STATUSES or order.payment_status != PaymentStatus.pending:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Order cannot be modified. Current status: {order.status.value}, payment: {order.payment_status.value}"
+        )
+    
+    # Every dish an add / set_quantity step names must exist and be orderable (one IN (...) query)
+    menu_item_ids = [
+        operation.menu_item_id for operation in operations
+        if operation.op != OrderItemOp.remove
+    ]
+    menu_items = await db.run_sync(menu_item_crud.get_many, ids=menu_item_ids)
+    for menu_item_id in menu_item_ids:
+        menu_item = menu_items.get(menu_item_id)
+        if not menu_item:
+            raise HTTPException(status_code=400, detail=f"Menu item {menu_item_id} not found")
+        if not menu_item.is_available:
+            raise HTTPException(status_code=400, detail=f"Menu item '{menu_item.name}' is not available")
+    
+    await db.run_sync(
+        order_crud.apply_item_operations,
+        order=order,
+        operations=operations,
+        menu_items=menu_items
+    )
+    # Reload with items eagerly joined; lazy loads can't run during serialization
+    return await db.run_sync(order_crud.get, id=order_id)
+
+
 @router.patch("/orders/{order_id}/confirm", response_model=Order)
 def confirm_order(
     *,
@@ -1,15 +1,18 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, date
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, get_read_db
 from app.crud.table import table as table_crud
 from app.crud.order import reservation as reservation_crud
+from app.crud.pagination import CountMode
 from app.schemas.table import Table, TableCreate, TableUpdate, TableStatusUpdate
 from app.schemas.order import ReservationCreate, ReservationWithDetails
 from app.models.table import TableStatus
-from app.api.deps import get_current_staff_user, get_current_user_optional
+from app.api.conditional import CACHE_LIVE, conditional_response, make_etag
+from app.api.deps import get_current_staff_user, get_current_user_optional, get_current_user_optional_async
 from app.core.business_hours import BusinessHours
 from pydantic import BaseModel
 
@@ -18,32 +21,37 @@ router = APIRouter()
 
 class TablesResponse(BaseModel):
     tables: List[Table]
-    total: int
+    total: Optional[int]  # None with count=none
 
 
 @router.get("/", response_model=TablesResponse)
 def read_tables(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     active_only: bool = Query(True, description="Filter only active tables"),
     status: Optional[TableStatus] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search by table number or location"),
+    count: CountMode = Query(CountMode.exact, description="Total: exact, estimate (planner) or none"),
     current_user = Depends(get_current_user_optional),
 ) -> Any:
     """
     Retrieve tables with pagination and search.
     """
-    tables = table_crud.get_multi(
+    table_count, max_id, last_modified = table_crud.get_version(db)
+    etag = make_etag("tables", table_count, max_id, last_modified, request.url.query)
+    not_modified = conditional_response(request, response, etag, CACHE_LIVE, last_modified)
+    if not_modified:
+        return not_modified
+    
+    tables, total = table_crud.get_page(
         db, skip=skip, limit=limit, 
         active_only=active_only, 
         status=status,
-        search=search
-    )
-    total = table_crud.count(
-        db, active_only=active_only, 
-        status=status,
-        search=search
+        search=search,
+        count=count
     )
     return TablesResponse(tables=tables, total=total)
 
@@ -97,22 +105,6 @@ def create_table(
     return table
 
 
-@router.get("/{table_id}", response_model=Table)
-def read_table(
-    *,
-    db: Session = Depends(get_db),
-    table_id: int,
-    current_user = Depends(get_current_user_optional),
-) -> Any:
-    """
-    Get table by ID.
-    """
-    table = table_crud.get(db, id=table_id)
-    if not table:
-        raise HTTPException(status_code=404, detail="Table not found")
-    return table
-
-
 @router.put("/{table_id}", response_model=Table)
 def update_table(
     *,
@@ -190,12 +182,12 @@ class AvailabilityResponse(BaseModel):
 
 
 @router.get("/check-availability", response_model=AvailabilityResponse)
-def check_table_availability(
+async def check_table_availability(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     time: str = Query(..., description="Time in HH:MM format"), 
     guests: int = Query(..., description="Number of guests"),
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user_optional_async),
 ) -> Any:
     """
     Check table availability for given date, time and number of guests.
@@ -220,11 +212,17 @@ def check_table_availability(
                 is_within_hours = True
                 break
         
+        def suggest_times(session):
+            # Nearest bookable slots of that day, checked in one pass over the day's grid
+            slots = table_crud.suggest_reservation_times(
+                session, party_size=guests, around=reservation_datetime, duration_hours=2
+            )
+            return [slot.strftime("%H:%M") for slot in slots]
+        
         if not is_within_hours:
-            suggested_times = ["10:00", "11:00", "12:00", "17:00", "18:00", "19:00", "20:00", "21:00"]
             return AvailabilityResponse(
                 available=False,
-                suggested_times=suggested_times,
+                suggested_times=await db.run_sync(suggest_times),
                 available_tables=[]
             )
         
@@ -233,17 +231,15 @@ def check_table_availability(
         if lunch_break:
             break_start, break_end = lunch_break
             if break_start <= check_time <= break_end:
-                suggested_times = ["10:00", "10:30", "11:00", "11:30", "12:00", "12:30", "13:00", "13:30", 
-                                 "17:00", "17:30", "18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"]
                 return AvailabilityResponse(
                     available=False,
-                    suggested_times=suggested_times,
+                    suggested_times=await db.run_sync(suggest_times),
                     available_tables=[]
                 )
         
         # Get available tables for the requested time
-        available_tables = table_crud.get_available_tables(
-            db, 
+        available_tables = await db.run_sync(
+            table_crud.get_available_tables,
             min_capacity=guests,
             reservation_datetime=reservation_datetime,
             duration_hours=2
@@ -252,21 +248,7 @@ def check_table_availability(
         # If no tables available, suggest alternative times
         suggested_times = []
         if not available_tables:
-            # Check availability for nearby time slots
-            for offset_hours in [1, -1, 2, -2]:
-                alt_datetime = reservation_datetime + timedelta(hours=offset_hours)
-                is_valid_alt, _ = BusinessHours.validate_reservation_time(alt_datetime)
-                if is_valid_alt:
-                    alt_tables = table_crud.get_available_tables(
-                        db, 
-                        min_capacity=guests,
-                        reservation_datetime=alt_datetime,
-                        duration_hours=2
-                    )
-                    if alt_tables:
-                        suggested_times.append(alt_datetime.strftime("%H:%M"))
-                        if len(suggested_times) >= 4:  # Limit suggestions
-                            break
+            suggested_times = await db.run_sync(suggest_times)
         
         return AvailabilityResponse(
             available=bool(available_tables),
@@ -279,11 +261,11 @@ def check_table_availability(
 
 
 @router.post("/book", response_model=ReservationWithDetails)
-def book_table(
+async def book_table(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     reservation_in: ReservationCreate,
-    current_user = Depends(get_current_user_optional),
+    current_user = Depends(get_current_user_optional_async),
 ) -> Any:
     """
     Book a table for a customer.
@@ -299,7 +281,7 @@ def book_table(
     
     # Check if table exists and has sufficient capacity
     if reservation_in.table_id:
-        table = table_crud.get(db, id=reservation_in.table_id)
+        table = await db.run_sync(table_crud.get, id=reservation_in.table_id)
         if not table:
             raise HTTPException(status_code=400, detail="Table not found")
         
@@ -310,8 +292,8 @@ def book_table(
             )
     else:
         # Auto-assign available table
-        available_tables = table_crud.get_available_tables(
-            db, 
+        available_tables = await db.run_sync(
+            table_crud.get_available_tables,
             min_capacity=reservation_in.party_size,
             reservation_datetime=reservation_in.reservation_date,
             duration_hours=2
@@ -334,8 +316,9 @@ def book_table(
         (datetime.combine(date.today(), start_time.time()) + timedelta(hours=2)).time()
     )
     
-    conflicting_reservations = reservation_crud.get_by_date_range(
-        db, start_date=start_time, end_date=end_time, table_id=reservation_in.table_id
+    conflicting_reservations = await db.run_sync(
+        reservation_crud.get_by_date_range,
+        start_date=start_time, end_date=end_time, table_id=reservation_in.table_id
     )
     
     if conflicting_reservations:
@@ -345,10 +328,10 @@ def book_table(
         )
     
     # Create reservation
-    reservation = reservation_crud.create(db, obj_in=reservation_in)
+    reservation = await db.run_sync(reservation_crud.create, obj_in=reservation_in)
     
     # Get full details for the created reservation
-    reservation_details = reservation_crud.get_with_details(db, reservation_id=reservation.id)
+    reservation_details = await db.run_sync(reservation_crud.get_with_details, reservation_id=reservation.id)
     
     return reservation_details
 
@@ -460,6 +443,8 @@ def sync_all_table_statuses(
 @router.get("/status-summary")
 def get_table_status_summary(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user_optional),
 ) -> Any:
@@ -468,10 +453,33 @@ def get_table_status_summary(
     """
     from app.services.table_status_manager import create_table_status_manager
     
+    count, max_id, last_modified = table_crud.get_version(db)
+    etag = make_etag("tables/status-summary", count, max_id, last_modified)
+    not_modified = conditional_response(request, response, etag, CACHE_LIVE, last_modified)
+    if not_modified:
+        return not_modified
+    
     status_manager = create_table_status_manager(db)
     summary = status_manager.get_table_status_summary()
     
     return {
         "status_summary": summary,
         "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+
+# Declared last so the dynamic path does not shadow /check-availability, /status-summary
+@router.get("/{table_id}", response_model=Table)
+def read_table(
+    *,
+    db: Session = Depends(get_db),
+    table_id: int,
+    current_user = Depends(get_current_user_optional),
+) -> Any:
+    """
+    Get table by ID.
+    """
+    table = table_crud.get(db, id=table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    return table
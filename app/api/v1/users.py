@@ -1,9 +1,10 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.crud.user import user as user_crud
+from app.crud.pagination import next_cursor
 from app.schemas.user import User, UserUpdate
 from app.api.deps import get_current_user, get_current_manager_user, get_current_admin_user
 from app.models.user import UserRole
@@ -40,15 +41,21 @@ def update_user_me(
 
 @router.get("/", response_model=List[User])
 def read_users(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page (replaces skip)"),
     current_user: User = Depends(get_current_manager_user),
 ) -> Any:
     """
     Retrieve users (Manager+ only).
+    The cursor for the next page is returned in the X-Next-Cursor header.
     """
-    users = user_crud.get_multi(db, skip=skip, limit=limit)
+    users = user_crud.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    cursor_after = next_cursor(users, limit, key=lambda u: (u.created_at, u.id))
+    if cursor_after:
+        response.headers["X-Next-Cursor"] = cursor_after
     return users
 
 
@@ -0,0 +1,300 @@
+"""
+In-memory table availability index
+Giữ lịch đặt bàn đang hoạt động của N ngày tới theo từng bàn (danh sách khoảng đã sắp xếp) để kiểm tra bàn trống không cần truy vấn
+
+Same conflict rule as the SQL path in CRUDTable.get_available_tables: an active
+(pending / confirmed) reservation [start, end] blocks a table for [t, t + d]
+when the closed intervals intersect; reservations without an end never block.
+Timezone-aware values are compared in UTC and naive values as given, as
+PostgreSQL does with a UTC session.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.menu_cache import bump_cache_version
+from app.models.cache_version import CacheVersion
+from app.models.order import Reservation, ReservationStatus
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CACHE_NAME = "reservations"
+ACTIVE_STATUSES = (ReservationStatus.pending, ReservationStatus.confirmed)
+# Reservations that ended up to this long ago are still indexed (late check-availability calls)
+LOOKBACK = timedelta(days=1)
+# The window slides forward (and is cross-checked against the database) this often
+REBUILD_INTERVAL_SECONDS = 300
+
+# reservation id -> (table id, start, end)
+Intervals = Dict[int, Tuple[int, datetime, datetime]]
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class ReservationIntervals:
+    """Immutable snapshot of the active reservations intersecting [window_start, window_end].
+
+    Per table: intervals sorted by start plus the longest duration, so a lookup
+    bisects to the few intervals that can reach the requested slot.
+    """
+
+    def __init__(self, version: int, window_start: datetime, window_end: datetime, reservations: Intervals,
+                 tables: Optional[Dict[int, tuple]] = None):
+        self.version = version
+        self.window_start = window_start
+        self.window_end = window_end
+        self.reservations = reservations
+        if tables is None:
+            by_table: Dict[int, List[Tuple[datetime, datetime, int]]] = {}
+            for reservation_id, (table_id, start, end) in reservations.items():
+                by_table.setdefault(table_id, []).append((start, end, reservation_id))
+            tables = {table_id: self._index(intervals) for table_id, intervals in by_table.items()}
+        self._tables = tables
+
+    @staticmethod
+    def _index(intervals: List[Tuple[datetime, datetime, int]]) -> tuple:
+        intervals = sorted(intervals)
+        longest = max((end - start for start, end, _ in intervals), default=timedelta(0))
+        return [start for start, _, _ in intervals], intervals, longest
+
+    def in_window(self, start: datetime, end: datetime) -> bool:
+        return end >= self.window_start and start <= self.window_end
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """True if every reservation that could overlap [start, end] is in this snapshot"""
+        return self.window_start <= start and end <= self.window_end
+
+    def busy_table_ids(self, start: datetime, end: datetime) -> Set[int]:
+        busy = set()
+        for table_id, (starts, intervals, longest) in self._tables.items():
+            # Only intervals starting in [start - longest, end] can intersect [start, end]
+            for _, interval_end, _ in intervals[bisect_left(starts, start - longest):bisect_right(starts, end)]:
+                if interval_end >= start:
+                    busy.add(table_id)
+                    break
+        return busy
+
+    def with_change(self, reservation_id: int, interval: Optional[Tuple[int, datetime, datetime]]):
+        """Copy with one reservation replaced (None: removed); only the affected tables are re-indexed"""
+        reservations = dict(self.reservations)
+        affected = set()
+        previous = reservations.pop(reservation_id, None)
+        if previous is not None:
+            affected.add(previous[0])
+        if interval is not None and self.in_window(interval[1], interval[2]):
+            reservations[reservation_id] = interval
+            affected.add(interval[0])
+        if not affected:
+            return self
+        tables = dict(self._tables)
+        for table_id in affected:
+            intervals = [
+                (start, end, rid) for rid, (tid, start, end) in reservations.items() if tid == table_id
+            ]
+            if intervals:
+                tables[table_id] = self._index(intervals)
+            else:
+                tables.pop(table_id, None)
+        return ReservationIntervals(self.version, self.window_start, self.window_end, reservations, tables)
+
+
+def _interval(reservation: Reservation) -> Optional[Tuple[int, datetime, datetime]]:
+    if (reservation.status not in ACTIVE_STATUSES or reservation.table_id is None
+            or reservation.reservation_datetime is None or reservation.estimated_end_time is None):
+        return None
+    return reservation.table_id, _utc(reservation.reservation_datetime), _utc(reservation.estimated_end_time)
+
+
+def _mismatches(old: ReservationIntervals, new: ReservationIntervals) -> int:
+    """Reservations the two snapshots disagree on, over the part of the window both cover"""
+    start, end = max(old.window_start, new.window_start), min(old.window_end, new.window_end)
+
+    def visible(snapshot: ReservationIntervals) -> Intervals:
+        return {rid: row for rid, row in snapshot.reservations.items() if row[2] >= start and row[1] <= end}
+
+    before, after = visible(old), visible(new)
+    return sum(1 for rid in before.keys() | after.keys() if before.get(rid) != after.get(rid))
+
+
+class TableAvailabilityIndex:
+    """Per-worker availability snapshot validated against the cache_versions row.
+
+    Reservation writes bump the row in their transaction (bump_reservation_version)
+    and patch this worker's snapshot after commit (apply); other workers reload
+    within ``check_interval`` seconds. Every REBUILD_INTERVAL_SECONDS the window
+    slides forward and the old snapshot is compared with the database; a drift
+    means some write skipped the bump, so it is logged and replaced.
+    Callers fall back to SQL whenever busy_table_ids returns None.
+    """
+
+    def __init__(self, days: int, check_interval: float):
+        self.days = days
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ReservationIntervals] = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+        self.hits = 0
+        self.fallbacks = 0
+        self.loads = 0
+        self.applied = 0
+        self.drift = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def _read_version(self, db: Session) -> int:
+        try:
+            return db.query(CacheVersion.version).filter(CacheVersion.name == AVAILABILITY_CACHE_NAME).scalar() or 0
+        except Exception as e:
+            logger.warning(f"Không đọc được reservations cache version: {e}")
+            db.rollback()
+            return -1
+
+    def _load(self, db: Session, version: int, window_start: datetime, window_end: datetime) -> ReservationIntervals:
+        rows = db.query(
+            Reservation.id, Reservation.table_id, Reservation.reservation_datetime, Reservation.estimated_end_time
+        ).filter(
+            Reservation.status.in_(ACTIVE_STATUSES),
+            Reservation.estimated_end_time >= window_start,
+            Reservation.reservation_datetime <= window_end,
+        )
+        reservations = {
+            reservation_id: (table_id, _utc(start), _utc(end))
+            for reservation_id, table_id, start, end in rows
+            if table_id is not None
+        }
+        with self._lock:
+            self.loads += 1
+        return ReservationIntervals(version, window_start, window_end, reservations)
+
+    def _window(self) -> Tuple[datetime, datetime]:
+        now = datetime.utcnow()
+        return now - LOOKBACK, now + timedelta(days=self.days)
+
+    def get(self, db: Session) -> Optional[ReservationIntervals]:
+        """Current snapshot, reloading if the version moved or the window is due to slide"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        expired = now - self._built_at >= REBUILD_INTERVAL_SECONDS
+        if snapshot is not None and not expired and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        version = self._read_version(db)
+        if version < 0:
+            return None
+        if snapshot is not None and not expired and snapshot.version == version:
+            self._checked_at = now
+            return snapshot
+
+        fresh = self._load(db, version, *self._window())
+        if snapshot is not None and snapshot.version == version:
+            self._report_drift(snapshot, fresh)
+        with self._lock:
+            self._snapshot = fresh
+            self._checked_at = self._built_at = now
+        return fresh
+
+    def _report_drift(self, old: ReservationIntervals, new: ReservationIntervals) -> int:
+        mismatches = _mismatches(old, new)
+        if mismatches:
+            with self._lock:
+                self.drift += mismatches
+            logger.warning(f"Availability index lệch {mismatches} đặt bàn so với database; đã tải lại")
+        return mismatches
+
+    def verify(self, db: Session) -> dict:
+        """Consistency check: reload the current window from the database and compare"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"checked": 0, "mismatches": 0}
+        version = self._read_version(db)
+        fresh = self._load(db, version, snapshot.window_start, snapshot.window_end)
+        mismatches = self._report_drift(snapshot, fresh)
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = fresh
+        return {"checked": len(fresh.reservations), "mismatches": mismatches}
+
+    def busy_table_ids(self, db: Session, start: datetime, end: datetime) -> Optional[Set[int]]:
+        """Tables with an active reservation intersecting [start, end]; None = answer with SQL"""
+        snapshot = self.get(db) if self.enabled else None
+        start, end = _utc(start), _utc(end)
+        if snapshot is None or not snapshot.covers(start, end):
+            with self._lock:
+                self.fallbacks += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return snapshot.busy_table_ids(start, end)
+
+    def intervals(self, db: Session, start: datetime, end: datetime) -> ReservationIntervals:
+        """Active reservations intersecting [start, end]: the shared snapshot when it covers
+        the range, otherwise a one-off snapshot of just that range (one query)"""
+        snapshot = self.get(db) if self.enabled else None
+        start, end = _utc(start), _utc(end)
+        if snapshot is not None and snapshot.covers(start, end):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+        with self._lock:
+            self.fallbacks += 1
+        return self._load(db, -1, start, end)
+
+    def apply(self, reservations: Iterable[Reservation]) -> None:
+        """Patch this worker's snapshot with committed reservation rows"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            for reservation in reservations:
+                snapshot = snapshot.with_change(reservation.id, _interval(reservation))
+                self.applied += 1
+            self._snapshot = snapshot
+
+    def remove(self, reservation_id: int) -> None:
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot = self._snapshot.with_change(reservation_id, None)
+                self.applied += 1
+
+    def warm(self, db: Session) -> None:
+        if self.enabled:
+            self.get(db)
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "days": self.days,
+                "version": snapshot.version if snapshot else None,
+                "reservations": len(snapshot.reservations) if snapshot else 0,
+                "window_start": snapshot.window_start if snapshot else None,
+                "window_end": snapshot.window_end if snapshot else None,
+                "check_interval_seconds": self.check_interval,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "loads": self.loads,
+                "applied": self.applied,
+                "drift": self.drift,
+            }
+
+
+table_availability = TableAvailabilityIndex(
+    days=settings.AVAILABILITY_INDEX_DAYS, check_interval=settings.AVAILABILITY_CHECK_INTERVAL
+)
+
+
+def bump_reservation_version(db: Session) -> None:
+    """Bump the reservations version inside the caller's transaction (call before commit)"""
+    bump_cache_version(db, AVAILABILITY_CACHE_NAME)
@@ -1,7 +1,7 @@
 """
 Business Hours Management for RestoBot
 """
-from datetime import datetime, time, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Dict, List, Tuple
 import pytz
 
@@ -30,6 +30,23 @@ class BusinessHours:
         6: None,  # Sunday: No lunch break
     }
     
+    # Grid reservation times are offered on (suggestions, availability search)
+    SLOT_MINUTES = 30
+    
+    @classmethod
+    def day_slots(cls, day: date) -> List[datetime]:
+        """Every SLOT_MINUTES start time on ``day`` within business hours, outside the lunch break"""
+        weekday = day.weekday()
+        slots = []
+        for start_time, end_time in cls.BUSINESS_HOURS.get(weekday, []):
+            slot = datetime.combine(day, start_time)
+            last = datetime.combine(day, end_time)
+            while slot <= last:
+                if cls.is_open_at_time(weekday, slot.time()):
+                    slots.append(slot)
+                slot += timedelta(minutes=cls.SLOT_MINUTES)
+        return slots
+    
     @classmethod
     def is_open_now(cls) -> bool:
         """Check if restaurant is currently open"""
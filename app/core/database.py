@@ -1,13 +1,61 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+
+
+def _pool_options(url: str, poolclass) -> dict:
+    """Pool sizing from settings; SQLite (tests, local dev) keeps SQLAlchemy's default pool"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
-engine = create_engine(settings.DATABASE_URL)
+
+engine = create_engine(settings.DATABASE_URL, **_pool_options(settings.DATABASE_URL, InstrumentedQueuePool))
+instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """Map the sync DSN onto its asyncio driver (postgresql:// -> postgresql+asyncpg://)"""
+    if url.startswith("postgresql+asyncpg://"):
+        return url
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://") and not url.startswith("sqlite+aiosqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Async engine for the hot request paths. Concurrency on these routes is bounded
+# by this engine's connection pool instead of the anyio threadpool.
+_async_url = settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **_pool_options(_async_url, InstrumentedAsyncQueuePool))
+instrument_engine(async_engine, "primary_async")
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 
 def get_db():
     """Dependency to get DB session"""
@@ -15,4 +63,173 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Dependency to get async DB session.
+
+    CRUD helpers are sync-style; call them through ``await db.run_sync(crud.fn, ...)``
+    which runs them on the event loop (no worker thread) against the async connection.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Read replicas
+# A replica is used only while its last health check succeeded and its replay lag
+# is within REPLICA_MAX_LAG_SECONDS; otherwise reads fall back to the primary.
+_PG_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def _connect_args(url: str, timeout: int) -> dict:
+    """Driver connect timeout: psycopg2 takes ``connect_timeout``, asyncpg ``timeout``"""
+    if url.startswith("postgresql+asyncpg://"):
+        return {"timeout": timeout}
+    if url.startswith(("postgresql", "postgres://")):
+        return {"connect_timeout": timeout}
+    return {}
+
+
+class _Replica:
+    def __init__(self, index: int, url: str, connect_timeout: int):
+        self.name = f"replica_{index}"
+        self.engine = create_engine(
+            url, connect_args=_connect_args(url, connect_timeout), **_pool_options(url, InstrumentedQueuePool)
+        )
+        instrument_engine(self.engine, self.name)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        async_url = _async_database_url(url)
+        self.async_engine = create_async_engine(
+            async_url, connect_args=_connect_args(async_url, connect_timeout),
+            **_pool_options(async_url, InstrumentedAsyncQueuePool)
+        )
+        instrument_engine(self.async_engine, f"{self.name}_async")
+        self.AsyncSessionLocal = sessionmaker(
+            bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_checked = 0.0
+        self.last_error: Optional[str] = None
+        self._check_lock = threading.Lock()
+
+    @property
+    def lag_sql(self):
+        return _PG_REPLICA_LAG_SQL if self.engine.dialect.name == "postgresql" else text("SELECT 0")
+
+    def claim_check(self, interval: float) -> bool:
+        """True for exactly one caller per interval: last_checked is stamped before probing,
+        so concurrent requests keep using the previous result instead of probing too"""
+        with self._check_lock:
+            now = time.monotonic()
+            if now - self.last_checked < interval:
+                return False
+            self.last_checked = now
+            return True
+
+    def record_check(self, lag: Optional[float], error: Optional[Exception], max_lag: float) -> None:
+        was_healthy = self.healthy
+        self.lag_seconds = float(lag) if lag is not None else None
+        self.last_error = str(error) if error else None
+        self.healthy = error is None and (self.lag_seconds or 0) <= max_lag
+        if was_healthy and not self.healthy:
+            logger.warning(f"{self.name} unhealthy (lag={self.lag_seconds}, error={self.last_error}), using primary")
+        elif self.healthy and not was_healthy:
+            logger.info(f"{self.name} healthy (lag={self.lag_seconds})")
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas with fallback to the primary"""
+
+    def __init__(self, urls: List[str], max_lag_seconds: float, check_interval: float, connect_timeout: int):
+        self.replicas = [_Replica(i, url, connect_timeout) for i, url in enumerate(urls)]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+
+    def _candidates(self) -> List[_Replica]:
+        if not self.replicas:
+            return []
+        start = next(self._counter) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def check(self, replica: _Replica) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                lag = conn.execute(replica.lag_sql).scalar()
+            replica.record_check(lag, None, self.max_lag_seconds)
+        except Exception as e:
+            replica.record_check(None, e, self.max_lag_seconds)
+
+    async def acheck(self, replica: _Replica) -> None:
+        try:
+            async with replica.async_engine.connect() as conn:
+                lag = (await conn.execute(replica.lag_sql)).scalar()
+            replica.record_check(lag, None, self.max_lag_seconds)
+        except Exception as e:
+            replica.record_check(None, e, self.max_lag_seconds)
+
+    def session(self):
+        for replica in self._candidates():
+            if replica.claim_check(self.check_interval):
+                self.check(replica)
+            if replica.healthy:
+                return replica.SessionLocal()
+        return SessionLocal()
+
+    async def async_session(self):
+        for replica in self._candidates():
+            if replica.claim_check(self.check_interval):
+                await self.acheck(replica)
+            if replica.healthy:
+                return replica.AsyncSessionLocal()
+        return AsyncSessionLocal()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
+
+
+read_router = ReplicaRouter(
+    settings.DATABASE_REPLICA_URLS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL,
+    connect_timeout=settings.REPLICA_CONNECT_TIMEOUT,
+)
+
+
+def get_read_db():
+    """Dependency to get a read-only DB session (replica when healthy, else primary).
+
+    Only for endpoints that tolerate replication lag; never write through it.
+    """
+    db = read_router.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Async version of get_read_db"""
+    db = await read_router.async_session()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,183 @@
+"""
+Idempotency-Key support for retried POSTs (order creation, item adds, payments)
+Chatbot và web retry khi timeout: cùng key -> trả lại response đã lưu, không tạo đơn / thanh toán lần nữa
+
+The first request with a key claims a row in idempotency_keys, runs, and stores
+its 2xx response; replays within the TTL get that response back (with an
+Idempotent-Replayed header) without touching the route. Failed requests release
+the key so the client can retry them for real.
+"""
+import hashlib
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Expired rows are purged opportunistically, at most this often per worker
+PURGE_INTERVAL_SECONDS = 60
+
+# (method, path below the API prefix) of the endpoints that honor the header
+IDEMPOTENT_ROUTES = (
+    ("POST", re.compile(r"^/orders/orders/?$")),
+    ("POST", re.compile(r"^/orders/orders/\d+/items/?$")),
+    ("PATCH", re.compile(r"^/orders/orders/\d+/items/?$")),
+    ("POST", re.compile(r"^/orders/orders/\d+/payment/?$")),
+)
+
+_keys = IdempotencyKey.__table__
+
+
+def _is_idempotent_route(method: str, path: str) -> bool:
+    return any(method == route_method and pattern.match(path) for route_method, pattern in IDEMPOTENT_ROUTES)
+
+
+def _scope(request: Request) -> str:
+    """Key namespace: endpoint plus caller, so keys never replay across users or routes"""
+    caller = request.headers.get("authorization") or request.headers.get("x-rasa-request") or ""
+    raw = f"{request.method} {request.url.path} {caller}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Claim / complete / release rows in idempotency_keys (async, own sessions)"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._purged_at = 0.0
+        self.claims = 0
+        self.replays = 0
+        self.conflicts = 0
+
+    async def claim(self, key: str, scope: str, request_hash: str) -> Optional[Tuple[str, Optional[int], Optional[str]]]:
+        """Claim ``key`` for this request. Returns None if claimed, otherwise the existing
+        row as (request_hash, status_code, response_body); status_code None = still running."""
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            await self._purge_expired(db, now)
+            for _ in range(2):
+                try:
+                    await db.execute(insert(_keys).values(
+                        key=key, scope=scope, request_hash=request_hash,
+                        expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    ))
+                    await db.commit()
+                    self.claims += 1
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+                row = (await db.execute(
+                    select(_keys.c.request_hash, _keys.c.status_code, _keys.c.response_body, _keys.c.expires_at)
+                    .where(_keys.c.key == key, _keys.c.scope == scope)
+                )).first()
+                if row is None:
+                    continue  # released in between; claim again
+                expires_at = row.expires_at if row.expires_at.tzinfo else row.expires_at.replace(tzinfo=timezone.utc)
+                if expires_at > now:
+                    return row.request_hash, row.status_code, row.response_body
+                # Stale entry: drop it and claim afresh
+                await db.execute(delete(_keys).where(
+                    _keys.c.key == key, _keys.c.scope == scope, _keys.c.expires_at <= now
+                ))
+                await db.commit()
+        return None
+
+    async def complete(self, key: str, scope: str, status_code: int, body: bytes) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(_keys).where(_keys.c.key == key, _keys.c.scope == scope)
+                .values(status_code=status_code, response_body=body.decode("utf-8"))
+            )
+            await db.commit()
+
+    async def release(self, key: str, scope: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(_keys).where(_keys.c.key == key, _keys.c.scope == scope))
+            await db.commit()
+
+    async def _purge_expired(self, db, now: datetime) -> None:
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL_SECONDS:
+            return
+        self._purged_at = time.monotonic()
+        result = await db.execute(delete(_keys).where(_keys.c.expires_at <= now))
+        await db.commit()
+        if result.rowcount:
+            logger.info(f"Purged {result.rowcount} expired idempotency keys")
+
+    def stats(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "claims": self.claims,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+        }
+
+
+def add_idempotency_middleware(app, api_prefix: str, store: IdempotencyStore):
+    """Honor Idempotency-Key on IDEMPOTENT_ROUTES; other requests pass straight through"""
+
+    @app.middleware("http")
+    async def idempotency_middleware(request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        path = request.url.path
+        if (not key or not path.startswith(api_prefix)
+                or not _is_idempotent_route(request.method, path[len(api_prefix):])):
+            return await call_next(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JSONResponse(status_code=400, content={"detail": f"{IDEMPOTENCY_HEADER} is too long"})
+
+        scope = _scope(request)
+        request_hash = hashlib.sha256(await request.body()).hexdigest()
+        existing = await store.claim(key, scope, request_hash)
+        if existing is not None:
+            stored_hash, status_code, body = existing
+            if stored_hash != request_hash:
+                store.conflicts += 1
+                return JSONResponse(
+                    status_code=422,
+                    content={"detail": f"{IDEMPOTENCY_HEADER} was already used with a different request body"},
+                )
+            if status_code is None:
+                store.conflicts += 1
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": "A request with this Idempotency-Key is still in progress"},
+                    headers={"Retry-After": "1"},
+                )
+            store.replays += 1
+            return Response(
+                content=body, status_code=status_code, media_type="application/json",
+                headers={REPLAYED_HEADER: "true"},
+            )
+
+        try:
+            response = await call_next(request)
+            if not 200 <= response.status_code < 300:
+                await store.release(key, scope)
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            await store.complete(key, scope, response.status_code, body)
+        except Exception:
+            await store.release(key, scope)
+            raise
+        return Response(
+            content=body, status_code=response.status_code,
+            headers=dict(response.headers), media_type=response.media_type,
+        )
+
+
+idempotency_store = IdempotencyStore(ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
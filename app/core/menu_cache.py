@@ -0,0 +1,261 @@
+"""
+Menu catalog cache for RestoBot
+Giữ toàn bộ danh mục + món ăn trong bộ nhớ, đánh version để các worker biết khi nào cần tải lại
+"""
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.search import TrigramIndex, normalize_search_text
+from app.models.menu import Category, MenuItem
+from app.schemas.menu import CategoryWithItems
+
+logger = logging.getLogger(__name__)
+
+MENU_CACHE_NAME = "menu"
+
+_VERSION_SQL = text("SELECT version FROM cache_versions WHERE name = :name")
+# Upsert: a missing row (seeded as version 1) starts at 2; no check-then-insert race
+_BUMP_SQL = text(
+    "INSERT INTO cache_versions (name, version) VALUES (:name, 2) "
+    "ON CONFLICT (name) DO UPDATE SET version = cache_versions.version + 1"
+)
+
+
+# Internal columns not exposed by the API schemas
+_HIDDEN_COLUMNS = {"search_name"}
+
+
+def _columns(obj) -> dict:
+    return {
+        attr.key: getattr(obj, attr.key)
+        for attr in inspect(obj).mapper.column_attrs
+        if attr.key not in _HIDDEN_COLUMNS
+    }
+
+
+def _contains(value: Optional[str], term: str) -> bool:
+    # Same semantics as CRUDCategory's ilike('%term%')
+    return value is not None and term.lower() in value.lower()
+
+
+class MenuCatalog:
+    """Immutable snapshot of every category and menu item at one version.
+
+    Rows are plain dicts shaped like the API schemas (items carry their category),
+    kept in the same order the CRUD queries return them (name ascending).
+    """
+
+    def __init__(self, version: int, categories: List[dict], items: List[dict]):
+        self.version = version
+        self.categories = categories
+        self.items = items
+        self.categories_by_id: Dict[int, dict] = {c["id"]: c for c in categories}
+        self.items_by_id: Dict[int, dict] = {i["id"]: i for i in items}
+        self.search_names: Dict[int, str] = {i["id"]: normalize_search_text(i["name"]) for i in items}
+        self._search_index: Optional[TrigramIndex] = None
+        self._tree_json: Dict[Tuple[bool, bool], bytes] = {}
+
+    @property
+    def search_index(self) -> TrigramIndex:
+        # Built on first search; snapshots are immutable so a racing double build is harmless
+        if self._search_index is None:
+            self._search_index = TrigramIndex(self.search_names.items())
+        return self._search_index
+
+    def get_item(self, item_id: int) -> Optional[dict]:
+        return self.items_by_id.get(item_id)
+
+    def get_category(self, category_id: int) -> Optional[dict]:
+        return self.categories_by_id.get(category_id)
+
+    def filter_items(
+        self,
+        available_only: bool = True,
+        category_id: Optional[int] = None,
+        search_term: Optional[str] = None,
+        is_featured: Optional[bool] = None,
+        is_available: Optional[bool] = None,
+    ) -> List[dict]:
+        """In-memory equivalent of CRUDMenuItem.get_multi/get_count filters"""
+        normalized_term = normalize_search_text(search_term) if search_term else ""
+        result = []
+        for item in self.items:
+            if available_only and not item["is_available"]:
+                continue
+            if category_id and item["category_id"] != category_id:
+                continue
+            if normalized_term and normalized_term not in self.search_names[item["id"]]:
+                continue
+            if is_featured is not None and item["is_featured"] != is_featured:
+                continue
+            if is_available is not None and item["is_available"] != is_available:
+                continue
+            result.append(item)
+        return result
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        available_only: bool = True,
+        category_id: Optional[int] = None,
+        min_score: float = 0.3,
+    ) -> List[Tuple[dict, float]]:
+        """Ranked, accent- and typo-tolerant name search: [(item, score)], best first"""
+        results = []
+        for item_id, score in self.search_index.search(query, min_score=min_score):
+            item = self.items_by_id[item_id]
+            if available_only and not item["is_available"]:
+                continue
+            if category_id and item["category_id"] != category_id:
+                continue
+            results.append((item, score))
+            if len(results) >= limit:
+                break
+        return results
+
+    def featured_items(self) -> List[dict]:
+        return [item for item in self.items if item["is_featured"] and item["is_available"]]
+
+    def filter_categories(self, search: Optional[str] = None, active_only: bool = True) -> List[dict]:
+        """In-memory equivalent of CRUDCategory.get_multi_with_search/count_with_search"""
+        return [
+            category for category in self.categories
+            if (not active_only or category["is_active"])
+            and (not search or _contains(category["name"], search))
+        ]
+
+    def categories_with_items(self, active_only: bool = True, available_only: bool = True) -> List[dict]:
+        """Categories (by id), each with its items by name (items without the nested category)"""
+        by_category: Dict[int, List[dict]] = {}
+        for item in self.items:
+            if available_only and not item["is_available"]:
+                continue
+            by_category.setdefault(item["category_id"], []).append(
+                {key: value for key, value in item.items() if key != "category"}
+            )
+        return [
+            {**category, "menu_items": by_category.get(category["id"], [])}
+            for category in sorted(self.categories, key=lambda c: c["id"])
+            if not active_only or category["is_active"]
+        ]
+
+    def categories_with_items_json(self, active_only: bool = True, available_only: bool = True) -> bytes:
+        """The category tree pre-serialized exactly as the API returns it; built once per version"""
+        key = (active_only, available_only)
+        if key not in self._tree_json:
+            tree = [
+                CategoryWithItems(**category)
+                for category in self.categories_with_items(active_only, available_only)
+            ]
+            # Same encoding as FastAPI's JSONResponse
+            self._tree_json[key] = json.dumps(
+                jsonable_encoder(tree), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+            ).encode("utf-8")
+        return self._tree_json[key]
+
+
+class MenuCatalogCache:
+    """Per-worker catalog cache validated against the cache_versions row.
+
+    Writes bump the row in their own transaction (see bump_menu_version), so every
+    worker reloads within ``check_interval`` seconds; the writing worker at once.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._catalog: Optional[MenuCatalog] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.loads = 0
+        self.version_checks = 0
+        self.invalidations = 0
+
+    def _read_version(self, db: Session) -> int:
+        with self._lock:
+            self.version_checks += 1
+        try:
+            return db.execute(_VERSION_SQL, {"name": MENU_CACHE_NAME}).scalar() or 0
+        except Exception as e:
+            # cache_versions missing (migrations not applied yet): never trust the cache
+            logger.warning(f"Không đọc được menu cache version: {e}")
+            db.rollback()
+            return -1
+
+    def _load(self, db: Session, version: int) -> MenuCatalog:
+        categories = db.query(Category).order_by(Category.name.asc(), Category.id.asc()).all()
+        items = db.query(MenuItem).order_by(MenuItem.name.asc(), MenuItem.id.asc()).all()
+        category_rows = [_columns(category) for category in categories]
+        by_id = {row["id"]: row for row in category_rows}
+        item_rows = [{**_columns(item), "category": by_id.get(item.category_id)} for item in items]
+        with self._lock:
+            self.loads += 1
+        logger.info(f"Loaded menu catalog v{version}: {len(category_rows)} categories, {len(item_rows)} items")
+        return MenuCatalog(version, category_rows, item_rows)
+
+    def get(self, db: Session) -> MenuCatalog:
+        """Current catalog, reloading from ``db`` if another worker bumped the version.
+
+        No lock is held across queries (callers may be greenlets sharing one thread
+        under run_sync); concurrent reloads just race to swap in equal snapshots.
+        """
+        catalog = self._catalog
+        now = time.monotonic()
+        if catalog is not None and now - self._checked_at < self.check_interval:
+            with self._lock:
+                self.hits += 1
+            return catalog
+
+        version = self._read_version(db)
+        if catalog is not None and version > 0 and catalog.version == version:
+            self._checked_at = now
+            with self._lock:
+                self.hits += 1
+            return catalog
+
+        catalog = self._load(db, version)
+        if version > 0:
+            self._catalog = catalog
+            self._checked_at = now
+        return catalog
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._catalog = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        catalog = self._catalog
+        with self._lock:
+            return {
+                "version": catalog.version if catalog else None,
+                "categories": len(catalog.categories) if catalog else 0,
+                "items": len(catalog.items) if catalog else 0,
+                "check_interval_seconds": self.check_interval,
+                "hits": self.hits,
+                "loads": self.loads,
+                "version_checks": self.version_checks,
+                "invalidations": self.invalidations,
+            }
+
+
+menu_catalog = MenuCatalogCache(check_interval=settings.MENU_CACHE_CHECK_INTERVAL)
+
+
+def bump_cache_version(db: Session, name: str) -> None:
+    """Bump the cache_versions row ``name`` inside the caller's transaction (call before commit)"""
+    db.execute(_BUMP_SQL, {"name": name})
+
+
+def bump_menu_version(db: Session) -> None:
+    """Bump the menu version inside the caller's transaction (call before commit)"""
+    bump_cache_version(db, MENU_CACHE_NAME)
@@ -0,0 +1,123 @@
+"""
+Password hashing worker pool for RestoBot
+Chạy hash/verify mật khẩu (argon2, pbkdf2) trong process riêng để không chặn API worker
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hash/verify calls waiting; the caller should retry later"""
+
+
+class PasswordHasherPool:
+    """Bounded process pool for CPU-heavy password hashing.
+
+    At most ``workers`` hashes run at once (one per process); up to ``max_queue``
+    more wait for a free process, beyond that calls fail fast with PasswordHasherBusy.
+    ``workers=0`` hashes inline in the calling thread (CLI, seeding, tests).
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.in_flight - self.workers, 0)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a process that already runs event loop / pool threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Reserve a slot and hand ``fn`` to a worker process; the slot is freed when the
+        process finishes, even if the caller stopped waiting (cancelled request)"""
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.in_flight += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            executor = self._get_executor()
+
+        start = time.perf_counter()
+
+        def done(future: Future) -> None:
+            broken = not future.cancelled() and isinstance(future.exception(), BrokenProcessPool)
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_ms += (time.perf_counter() - start) * 1000
+                if broken and self._executor is executor:
+                    self._executor = None
+            if broken:
+                logger.error("Password hasher process pool broke, recreating")
+
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            failed = Future()
+            failed.set_exception(BrokenProcessPool("password hasher pool is broken"))
+            done(failed)
+            raise
+        future.add_done_callback(done)
+        return future
+
+    def run(self, fn: Callable, *args):
+        """Blocking call (sync code paths); the calling thread waits for the result"""
+        if self.workers <= 0:
+            return fn(*args)
+        return self._submit(fn, *args).result()
+
+    async def arun(self, fn: Callable, *args):
+        """Awaitable call for async endpoints: no threadpool thread is held while hashing"""
+        if self.workers <= 0:
+            return fn(*args)
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_ms / self.completed, 3) if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,156 @@
+"""
+Connection pool metrics for RestoBot
+Theo dõi pool kết nối database: số kết nối đang dùng, overflow, thời gian chờ
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counters and wait-time histogram for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.checkout_timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.pool: Optional[QueuePool] = None
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def _incr(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def snapshot(self) -> dict:
+        """Live pool state plus cumulative counters"""
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            # Cumulative like Prometheus buckets: le_Xms counts every wait <= X ms
+            histogram = {}
+            running = 0
+            for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets):
+                running += count
+                histogram[f"le_{bound}ms"] = running
+            histogram["le_inf"] = waits
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_avg_ms": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": histogram,
+            }
+
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "pool_timeout": pool.timeout(),
+            })
+        elif pool is not None:
+            data["status"] = pool.status()
+        return data
+
+
+_registry: Dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    if name not in _registry:
+        _registry[name] = PoolMetrics(name)
+    return _registry[name]
+
+
+def all_pool_metrics() -> Dict[str, dict]:
+    return {name: metrics.snapshot() for name, metrics in _registry.items()}
+
+
+class _TimedCheckoutMixin:
+    """Times how long callers wait for a connection and counts pool timeouts"""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        metrics = get_pool_metrics(self.metrics_name)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.record_timeout()
+            raise
+        finally:
+            metrics.record_wait((time.perf_counter() - start) * 1000)
+
+    def recreate(self):
+        # Keep the metrics name when the pool is recreated (e.g. engine.dispose())
+        new_pool = super().recreate()
+        new_pool.metrics_name = self.metrics_name
+        get_pool_metrics(self.metrics_name).pool = new_pool
+        return new_pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Attach pool event listeners that feed PoolMetrics for ``name``"""
+    metrics = get_pool_metrics(name)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    if isinstance(pool, _TimedCheckoutMixin):
+        pool.metrics_name = name
+    metrics.pool = pool
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics._incr("connects")
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics._incr("checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics._incr("checkins")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics._incr("invalidations")
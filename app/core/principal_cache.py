@@ -0,0 +1,93 @@
+"""
+Principal cache for RestoBot
+Cache thông tin user đã xác thực để không phải query bảng users ở mỗi request
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.models.user import User
+
+# Columns kept in the cache; hashed_password is left out and lazy-loads if needed
+_CACHED_COLUMNS = (
+    "id", "email", "username", "full_name", "phone", "role", "is_active", "created_at", "updated_at",
+)
+
+
+class PrincipalCache:
+    """Bounded LRU + TTL cache of user rows keyed by username.
+
+    Entries are invalidated by CRUDUser writes in this process; other workers see
+    a change (e.g. deactivation) after at most ``ttl_seconds``.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, username: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: User) -> None:
+        if not self.enabled:
+            return
+        snapshot = {column: getattr(user, column) for column in _CACHED_COLUMNS}
+        with self._lock:
+            self._entries[user.username] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *usernames: Optional[str]) -> None:
+        with self._lock:
+            for username in usernames:
+                if username and self._entries.pop(username, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
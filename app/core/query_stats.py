@@ -0,0 +1,113 @@
+"""
+Per-request SQL instrumentation for RestoBot
+Đếm số câu SQL, tổng thời gian và câu chậm nhất cho mỗi request
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """SQL statements executed while handling one request (or one test block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements = []
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements.append(statement)
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+
+_current_stats: contextvars.ContextVar = contextvars.ContextVar("query_stats", default=None)
+# Process-wide collectors for tests; TestClient runs the app in another thread/context
+_global_stats: List[QueryStats] = []
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None or _global_stats:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    for global_stats in _global_stats:
+        global_stats.record(statement, elapsed_ms)
+
+
+@contextmanager
+def track_queries():
+    """Collect QueryStats for the enclosed block (and any threads/greenlets it spawns)"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_count: int):
+    """Test helper: fail if the enclosed block issues more than ``max_count`` statements.
+    Counts every statement in the process, so use it around one request at a time:
+
+        with assert_max_queries(3):
+            client.get("/api/v1/arrivals/today", headers=headers)
+    """
+    stats = QueryStats()
+    _global_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_stats.remove(stats)
+    if stats.count > max_count:
+        statements = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {max_count} queries, got {stats.count}:\n{statements}")
+
+
+def add_query_stats_middleware(app, expose_headers: bool, log_count_threshold: int, log_time_threshold_ms: float):
+    """Track SQL per request; log requests above the thresholds, add X-DB-* headers in debug"""
+
+    @app.middleware("http")
+    async def query_stats_middleware(request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        if expose_headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Query-Time-Ms"] = f"{stats.total_ms:.1f}"
+            response.headers["X-DB-Slowest-Query-Ms"] = f"{stats.slowest_ms:.1f}"
+
+        if stats.count > log_count_threshold or stats.total_ms > log_time_threshold_ms:
+            logger.warning(
+                f"{request.method} {request.url.path}: {stats.count} queries, "
+                f"{stats.total_ms:.1f} ms SQL, slowest {stats.slowest_ms:.1f} ms: "
+                f"{(stats.slowest_statement or '')[:300]}"
+            )
+        return response
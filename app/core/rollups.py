@@ -0,0 +1,74 @@
+"""
+Keeps the sales rollup tables current for analytics reads
+Mỗi worker chạy catch-up tối đa một lần mỗi ROLLUP_REFRESH_INTERVAL giây, trước khi đọc báo cáo
+"""
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.rollup import sales_rollup
+
+logger = logging.getLogger(__name__)
+
+
+class RollupRefresher:
+    """Throttled, single-flight catch-up on the primary.
+
+    Reports may lag order changes by up to ``interval`` seconds. While one thread
+    refreshes, others read the current rollups instead of waiting.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self.refreshes = 0
+        self.days_recomputed = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def ensure_fresh(self) -> None:
+        if time.monotonic() - self._refreshed_at < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            self.skipped += 1
+            return
+        try:
+            if time.monotonic() - self._refreshed_at < self.interval:
+                return
+            self.refresh()
+        finally:
+            self._lock.release()
+
+    def refresh(self, full: bool = False) -> None:
+        db = SessionLocal()
+        try:
+            days = sales_rollup.catch_up(db, full=full)
+            if days is None:
+                self.skipped += 1  # another worker holds the catch-up lock
+            else:
+                self.refreshes += 1
+                self.days_recomputed += len(days)
+        except Exception as e:
+            self.errors += 1
+            db.rollback()
+            logger.warning(f"Không cập nhật được sales rollup: {e}")
+        finally:
+            # Also after a failure, so a broken refresh isn't retried on every request
+            self._refreshed_at = time.monotonic()
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "age_seconds": round(time.monotonic() - self._refreshed_at, 3) if self._refreshed_at else None,
+            "refreshes": self.refreshes,
+            "days_recomputed": self.days_recomputed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+sales_rollups = RollupRefresher(interval=settings.ROLLUP_REFRESH_INTERVAL)
@@ -0,0 +1,83 @@
+"""
+Menu search helpers for RestoBot
+Chuẩn hoá tiếng Việt không dấu ("Phở bò" -> "pho bo") và xếp hạng theo trigram (giống pg_trgm)
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+# A plain substring match shares at least this share of the query's trigrams
+SUBSTRING_MIN_COVERAGE = 0.5
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase, strip diacritics (incl. đ), collapse punctuation/whitespace to single spaces"""
+    if not text:
+        return ""
+    text = text.lower().replace("đ", "d")
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space"""
+    result: Set[str] = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class TrigramIndex:
+    """Inverted trigram index over normalized names for ranked, typo-tolerant lookup.
+
+    Identical names (the same dish in several branches) are indexed once. Score per
+    name (0..1): mostly how much of the query's trigrams the name covers (so short
+    queries match long names), plus Jaccard similarity to prefer closer names, plus
+    a bonus when the query is a plain substring of the name.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str]]):
+        self.keys_by_name: Dict[str, List[int]] = {}
+        for key, normalized in entries:
+            self.keys_by_name.setdefault(normalized, []).append(key)
+
+        self.names: List[str] = list(self.keys_by_name)
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        for name_id, normalized in enumerate(self.names):
+            grams = trigrams(normalized)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(name_id)
+
+    def search(self, query: str, min_score: float = 0.3) -> Iterator[Tuple[int, float]]:
+        """(key, score) pairs above ``min_score``, best first (lazy; stop after the page you need)"""
+        normalized = normalize_search_text(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+
+        # score <= coverage (+ bonus), so names sharing fewer trigrams can never qualify
+        query_size = len(query_grams)
+        min_common = max(1, math.ceil(query_size * min(min_score, SUBSTRING_MIN_COVERAGE)))
+        candidates = [(name_id, common) for name_id, common in shared.items() if common >= min_common]
+
+        sizes, names = self.sizes, self.names
+        scored = []
+        for name_id, common in candidates:
+            coverage = common / query_size
+            score = 0.7 * coverage + 0.3 * common / (query_size + sizes[name_id] - common)
+            if coverage >= SUBSTRING_MIN_COVERAGE and normalized in names[name_id]:
+                score = min(score + 0.3, 1.0)
+            if score >= min_score:
+                scored.append((round(score, 4), names[name_id]))
+        scored.sort(key=lambda result: (-result[0], result[1]))
+        return ((key, score) for score, name in scored for key in self.keys_by_name[name])
@@ -1,14 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.password_hasher import password_hasher
 
-# Use argon2 as primary scheme to avoid bcrypt version issues
+# Use argon2 as primary scheme to avoid bcrypt version issues.
+# pbkdf2_sha256 is only verified (legacy hashes) and re-hashed to argon2 on login.
 pwd_context = CryptContext(
     schemes=["argon2", "pbkdf2_sha256"],
-    deprecated="auto",
-    argon2__rounds=4,
+    deprecated=["pbkdf2_sha256"],
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
     pbkdf2_sha256__rounds=260000
 )
 
@@ -28,14 +32,38 @@ def create_access_token(
     return encoded_jwt
 
 
+# Run in the password_hasher worker processes (must stay module-level to be picklable)
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses outdated parameters"""
+    return password_hasher.run(_verify_and_update, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password)
+    return password_hasher.run(_hash, password)
+
+
+async def averify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password for async endpoints (awaits the hasher pool)"""
+    return await password_hasher.arun(_verify_and_update, plain_password, hashed_password)
+
+
+async def aget_password_hash(password: str) -> str:
+    """get_password_hash for async endpoints (awaits the hasher pool)"""
+    return await password_hasher.arun(_hash, password)
 
 
 def verify_token(token: str) -> Optional[str]:
@@ -0,0 +1,96 @@
+"""
+Short-TTL shared snapshots with single-flight refresh
+Nhiều dashboard cùng poll: một worker chỉ tính lại một lần mỗi TTL, các request khác dùng chung kết quả
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """One value per worker, recomputed at most once per ``ttl_seconds``.
+
+    When the snapshot expires, exactly one caller (the leader) runs the loader.
+    Concurrent callers keep getting the previous snapshot meanwhile, or wait for
+    the leader if there is none yet, so an expiry never fans out into N identical
+    queries. For sync routes (threadpool): waiters block on a threading.Event.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, wait_timeout: float = 10.0):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._loading: Optional[threading.Event] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.loads = 0
+        self.waits = 0
+
+    def get(self, loader: Callable[[], Any]) -> Any:
+        if self.ttl_seconds <= 0:
+            return loader()
+
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is not None and now - self._loaded_at < self.ttl_seconds:
+                self.hits += 1
+                return self._value
+            if self._loading is None:
+                self._loading = threading.Event()
+                leader = True
+            else:
+                leader = False
+                loading = self._loading
+                if self._loaded_at is not None:
+                    # Someone is already refreshing: serve the previous snapshot
+                    self.stale_hits += 1
+                    return self._value
+
+        if not leader:
+            with self._lock:
+                self.waits += 1
+            loading.wait(self.wait_timeout)
+            with self._lock:
+                if self._loaded_at is not None:
+                    return self._value
+            # The leader failed or timed out: compute for this caller only
+            return loader()
+
+        try:
+            value = loader()
+            with self._lock:
+                self._value = value
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+            return value
+        finally:
+            with self._lock:
+                self._loading.set()
+                self._loading = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "ttl_seconds": self.ttl_seconds,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "loads": self.loads,
+                "waits": self.waits,
+            }
+
+
+dashboard_stats_snapshot = SnapshotCache("dashboard_stats", ttl_seconds=settings.DASHBOARD_STATS_TTL_SECONDS)
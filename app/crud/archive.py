@@ -0,0 +1,197 @@
+"""
+Hot/cold split for orders, order_items and reservations
+Đơn hàng / đặt bàn đã đóng cũ hơn ARCHIVE_AFTER_MONTHS tháng được chuyển sang bảng *_archive (phân vùng theo tháng)
+
+The hot tables only keep the recent months plus anything still open, so status
+filters, searches and the dashboard never scan history. A date-range read adds
+the archive tables only when its range starts before archive_horizon().
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Text, delete, func, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.filters import day_bounds, restaurant_today, restaurant_tz, wall_day_bounds
+from app.models.archive import OrderArchive, OrderItemArchive, ReservationArchive
+from app.models.order import Order, OrderItem, OrderStatus, Reservation, ReservationStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_ORDER_STATUSES = (OrderStatus.completed, OrderStatus.cancelled)
+ARCHIVABLE_RESERVATION_STATUSES = (ReservationStatus.completed, ReservationStatus.cancelled, ReservationStatus.no_show)
+ARCHIVE_TABLES = (OrderArchive.__table__, OrderItemArchive.__table__, ReservationArchive.__table__)
+# Arbitrary key for pg_try_advisory_xact_lock; one archive run at a time across workers
+ARCHIVE_LOCK_KEY = 72_531_023
+# Rows moved per INSERT ... SELECT / DELETE pair
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a restaurant-local month as timezone-aware datetimes"""
+    return day_bounds(month.replace(day=1))[0], day_bounds(add_months(month, 1))[0]
+
+
+def _batches(ids: list) -> list:
+    return [ids[i:i + ARCHIVE_BATCH_SIZE] for i in range(0, len(ids), ARCHIVE_BATCH_SIZE)]
+
+
+def archive_horizon(today: Optional[date] = None) -> date:
+    """First day of the oldest month still entirely in the hot tables"""
+    return add_months((today or restaurant_today()).replace(day=1), -settings.ARCHIVE_AFTER_MONTHS)
+
+
+def order_sources(start_day: Optional[date]) -> list:
+    """(order model, item model) pairs a read from ``start_day`` on must cover (None = all history)"""
+    sources = [(Order, OrderItem)]
+    if start_day is None or start_day < archive_horizon():
+        sources.append((OrderArchive, OrderItemArchive))
+    return sources
+
+
+def reservation_sources(start_day: Optional[date]) -> list:
+    """Reservation models a read from ``start_day`` on must cover (None = all history)"""
+    sources = [Reservation]
+    if start_day is None or start_day < archive_horizon():
+        sources.append(ReservationArchive)
+    return sources
+
+
+def ensure_partitions(conn: Connection, first_month: date, last_month: date) -> List[str]:
+    """Create the missing monthly partitions of the archive tables (PostgreSQL only).
+
+    Archive rows are written once and never updated, so partitions are packed
+    (fillfactor 100) and their text columns use lz4 TOAST compression when the
+    server supports it.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+    lz4 = conn.execute(text(
+        "SELECT 'lz4' = ANY(enumvals) FROM pg_settings WHERE name = 'default_toast_compression'"
+    )).scalar()
+    created = []
+    month = first_month.replace(day=1)
+    while month <= last_month:
+        start, end = month_bounds(month)
+        for table in ARCHIVE_TABLES:
+            name = f"{table.name}_{month:%Y_%m}"
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+                continue
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table.name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}') WITH (fillfactor = 100)"
+            ))
+            if lz4:
+                for column in table.columns:
+                    if isinstance(column.type, Text):
+                        conn.execute(text(f"ALTER TABLE {name} ALTER COLUMN {column.name} SET COMPRESSION lz4"))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+class CRUDArchive:
+    def _order_filter(self, start: datetime, end: datetime):
+        return (Order.created_at >= start, Order.created_at < end, Order.status.in_(ARCHIVABLE_ORDER_STATUSES))
+
+    def _reservation_filter(self, start: datetime, end: datetime, horizon_start: datetime):
+        return (
+            Reservation.created_at >= start, Reservation.created_at < end,
+            Reservation.status.in_(ARCHIVABLE_RESERVATION_STATUSES),
+            # Booked ahead into the hot months: stays hot so reads from the horizon on still see it
+            # (reservation_datetime is wall-clock, so horizon_start is too)
+            Reservation.reservation_datetime < horizon_start,
+        )
+
+    def oldest_month(self, db: Session) -> Optional[date]:
+        """Month of the oldest archivable row still in the hot tables"""
+        oldest = [
+            db.query(func.min(Order.created_at)).filter(Order.status.in_(ARCHIVABLE_ORDER_STATUSES)).scalar(),
+            db.query(func.min(Reservation.created_at)).filter(
+                Reservation.status.in_(ARCHIVABLE_RESERVATION_STATUSES)
+            ).scalar(),
+        ]
+        oldest = [value if value.tzinfo else value.replace(tzinfo=timezone.utc) for value in oldest if value is not None]
+        if not oldest:
+            return None
+        return min(oldest).astimezone(restaurant_tz()).date().replace(day=1)
+
+    def archive_month(self, db: Session, month: date) -> dict:
+        """Move the closed orders (with their items) and reservations of ``month`` to the archive (caller commits).
+
+        Rows are picked by id first and moved in batches, so an order closed while
+        this runs is either moved whole (with its items) or left for the next run.
+        """
+        start, end = month_bounds(month)
+        horizon_start = wall_day_bounds(archive_horizon())[0]
+        ensure_partitions(db.connection(), month, month)
+        orders, items, reservations = Order.__table__, OrderItem.__table__, Reservation.__table__
+        order_columns = [column.name for column in orders.columns]
+        item_columns = [column.name for column in items.columns]
+        reservation_columns = [column.name for column in reservations.columns]
+        counts = {"month": month, "orders": 0, "order_items": 0, "reservations": 0}
+
+        order_ids = db.execute(
+            select(orders.c.id).where(*self._order_filter(start, end)).with_for_update()
+        ).scalars().all()
+        for batch in _batches(order_ids):
+            db.execute(insert(OrderItemArchive.__table__).from_select(
+                item_columns + ["order_created_at"],
+                select(*(items.c[name] for name in item_columns), orders.c.created_at)
+                .join(orders, items.c.order_id == orders.c.id).where(orders.c.id.in_(batch))
+            ))
+            db.execute(insert(OrderArchive.__table__).from_select(
+                order_columns, select(*(orders.c[name] for name in order_columns)).where(orders.c.id.in_(batch))
+            ))
+            counts["order_items"] += db.execute(delete(items).where(items.c.order_id.in_(batch))).rowcount
+            counts["orders"] += db.execute(delete(orders).where(orders.c.id.in_(batch))).rowcount
+
+        reservation_ids = db.execute(
+            select(reservations.c.id).where(*self._reservation_filter(start, end, horizon_start)).with_for_update()
+        ).scalars().all()
+        for batch in _batches(reservation_ids):
+            db.execute(insert(ReservationArchive.__table__).from_select(
+                reservation_columns,
+                select(*(reservations.c[name] for name in reservation_columns)).where(reservations.c.id.in_(batch))
+            ))
+            counts["reservations"] += db.execute(delete(reservations).where(reservations.c.id.in_(batch))).rowcount
+        return counts
+
+    def archive(self, db: Session) -> Optional[List[dict]]:
+        """Archive every month before archive_horizon(), one transaction per month.
+
+        Returns what was moved per month, or None if another worker is already archiving.
+        """
+        horizon = archive_horizon()
+        month = self.oldest_month(db)
+        moved = []
+        while month is not None and month < horizon:
+            if db.get_bind().dialect.name == "postgresql":
+                if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}).scalar():
+                    db.rollback()
+                    return None
+            result = self.archive_month(db, month)
+            db.commit()
+            logger.info(f"Archived {month:%Y-%m}: {result['orders']} orders, {result['reservations']} reservations")
+            moved.append(result)
+            month = add_months(month, 1)
+        return moved
+
+    def prepare_partitions(self, db: Session, months_ahead: int) -> List[str]:
+        """Pre-create archive partitions for every month the next ``months_ahead`` monthly runs will move"""
+        horizon = archive_horizon()
+        first = self.oldest_month(db) or horizon
+        created = ensure_partitions(db.connection(), min(first, horizon), add_months(horizon, months_ahead))
+        db.commit()
+        return created
+
+
+archive = CRUDArchive()
@@ -0,0 +1,63 @@
+"""
+Shared query filters for the CRUD layer
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Tuple
+import pytz
+from sqlalchemy import and_
+from app.core.config import settings
+
+
+def restaurant_tz():
+    return pytz.timezone(settings.RESTAURANT_TIMEZONE)
+
+
+def restaurant_today() -> date:
+    """Current date in the restaurant's timezone"""
+    return datetime.now(restaurant_tz()).date()
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a restaurant-local day as timezone-aware datetimes"""
+    tz = restaurant_tz()
+    start = tz.localize(datetime.combine(day, time.min))
+    end = tz.localize(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def on_day(column, day: date):
+    """Sargable replacement for ``func.date(column) == day``; lets btree indexes on column be used.
+
+    For server-stamped instants (created_at, ...); wall-clock columns use on_wall_day.
+    """
+    start, end = day_bounds(day)
+    return and_(column >= start, column < end)
+
+
+def between_days(column, start_day: date, end_day: date):
+    """Sargable range covering restaurant-local days start_day..end_day inclusive"""
+    start, _ = day_bounds(start_day)
+    _, end = day_bounds(end_day)
+    return and_(column >= start, column < end)
+
+
+# Reservation times are the restaurant-local wall clock as entered, stored without
+# conversion (the same convention as app/core/availability.py). Their days are
+# therefore bounded by naive datetimes, which a UTC session compares as stored.
+
+def wall_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a day as naive wall-clock datetimes"""
+    return datetime.combine(day, time.min), datetime.combine(day + timedelta(days=1), time.min)
+
+
+def on_wall_day(column, day: date):
+    """on_day for wall-clock columns such as Reservation.reservation_datetime"""
+    start, end = wall_day_bounds(day)
+    return and_(column >= start, column < end)
+
+
+def between_wall_days(column, start_day: date, end_day: date):
+    """between_days for wall-clock columns: days start_day..end_day inclusive"""
+    start, _ = wall_day_bounds(start_day)
+    _, end = wall_day_bounds(end_day)
+    return and_(column >= start, column < end)
@@ -1,5 +1,8 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, Iterable, Optional, List
+from app.core.menu_cache import bump_menu_version, menu_catalog
+from app.core.search import normalize_search_text
+from app.crud.pagination import keyset_page
 from app.models.menu import Category, MenuItem
 from app.schemas.menu import CategoryCreate, CategoryUpdate, MenuItemCreate, MenuItemUpdate
 
@@ -19,6 +22,18 @@ class CRUDCategory:
             query = query.filter(Category.is_active == True)
         return query.offset(skip).limit(limit).all()
 
+    def get_multi_with_items(
+        self, db: Session, active_only: bool = True, available_only: bool = True
+    ) -> List[Category]:
+        """Categories with menu_items loaded in one extra SELECT ... IN (no per-category lazy load)"""
+        menu_items = Category.menu_items
+        if available_only:
+            menu_items = menu_items.and_(MenuItem.is_available == True)
+        query = db.query(Category).options(selectinload(menu_items))
+        if active_only:
+            query = query.filter(Category.is_active == True)
+        return query.order_by(Category.id.asc()).all()
+
     def get_multi_with_search(
         self, db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, active_only: bool = True
     ) -> List[Category]:
@@ -47,7 +62,9 @@ class CRUDCategory:
             is_active=obj_in.is_active,
         )
         db.add(db_obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         db.refresh(db_obj)
         return db_obj
 
@@ -59,14 +76,18 @@ class CRUDCategory:
             setattr(db_obj, field, value)
 
         db.add(db_obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         db.refresh(db_obj)
         return db_obj
 
     def delete(self, db: Session, id: int) -> Category:
         obj = db.query(Category).get(id)
         db.delete(obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         return obj
 
 
@@ -74,6 +95,13 @@ class CRUDMenuItem:
     def get(self, db: Session, id: int) -> Optional[MenuItem]:
         return db.query(MenuItem).filter(MenuItem.id == id).first()
 
+    def get_many(self, db: Session, ids: Iterable[int]) -> Dict[int, MenuItem]:
+        """Load several items in one IN (...) query, keyed by id (missing ids are absent)"""
+        ids = set(ids)
+        if not ids:
+            return {}
+        return {item.id: item for item in db.query(MenuItem).filter(MenuItem.id.in_(ids)).all()}
+
     def get_by_name(self, db: Session, name: str) -> Optional[MenuItem]:
         return db.query(MenuItem).filter(MenuItem.name == name).first()
 
@@ -86,7 +114,8 @@ class CRUDMenuItem:
         category_id: Optional[int] = None,
         search_term: Optional[str] = None,
         is_featured: Optional[bool] = None,
-        is_available: Optional[bool] = None
+        is_available: Optional[bool] = None,
+        cursor: Optional[str] = None
     ) -> List[MenuItem]:
         query = db.query(MenuItem)
         if available_only:
@@ -94,13 +123,15 @@ class CRUDMenuItem:
         if category_id:
             query = query.filter(MenuItem.category_id == category_id)
         if search_term:
-            query = query.filter(MenuItem.name.ilike(f"%{search_term}%"))
+            query = query.filter(MenuItem.search_name.contains(normalize_search_text(search_term)))
         if is_featured is not None:
             query = query.filter(MenuItem.is_featured == is_featured)
         if is_available is not None:
             query = query.filter(MenuItem.is_available == is_available)
-        query = query.order_by(MenuItem.name.asc())
-        return query.offset(skip).limit(limit).all()
+        query = keyset_page(query, (MenuItem.name, MenuItem.id), cursor)
+        if not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     def get_count(
         self, 
@@ -117,7 +148,7 @@ class CRUDMenuItem:
         if category_id:
             query = query.filter(MenuItem.category_id == category_id)
         if search_term:
-            query = query.filter(MenuItem.name.ilike(f"%{search_term}%"))
+            query = query.filter(MenuItem.search_name.contains(normalize_search_text(search_term)))
         if is_featured is not None:
             query = query.filter(MenuItem.is_featured == is_featured)
         if is_available is not None:
@@ -132,7 +163,7 @@ class CRUDMenuItem:
 
     def search_by_name(self, db: Session, search_term: str) -> List[MenuItem]:
         return db.query(MenuItem).filter(
-            MenuItem.name.ilike(f"%{search_term}%"),
+            MenuItem.search_name.contains(normalize_search_text(search_term)),
             MenuItem.is_available == True
         ).all()
 
@@ -148,7 +179,9 @@ class CRUDMenuItem:
             category_id=obj_in.category_id,
         )
         db.add(db_obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         db.refresh(db_obj)
         return db_obj
 
@@ -160,14 +193,18 @@ class CRUDMenuItem:
             setattr(db_obj, field, value)
 
         db.add(db_obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         db.refresh(db_obj)
         return db_obj
 
     def delete(self, db: Session, id: int) -> MenuItem:
         obj = db.query(MenuItem).get(id)
         db.delete(obj)
+        bump_menu_version(db)
         db.commit()
+        menu_catalog.invalidate()
         return obj
 
 
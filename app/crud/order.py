@@ -1,16 +1,27 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Optional, List
+from sqlalchemy import func, and_, delete, insert, select, true, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, date
-from app.models.order import Order, OrderItem, Reservation, OrderStatus, PaymentStatus, ReservationStatus
+from app.models.order import (
+    Order, OrderItem, Reservation, OrderStatus, PaymentStatus, ReservationStatus, RESERVATION_DURATION
+)
 from app.models.menu import MenuItem
 from app.models.user import User, UserRole
 from app.models.table import Table, TableStatus
+from app.core.availability import bump_reservation_version, table_availability
+from app.crud.archive import order_sources, reservation_sources
+from app.crud.filters import between_days, between_wall_days, on_day, on_wall_day, restaurant_today
+from app.crud.pagination import CountMode, fetch_page
+from app.crud.menu import menu_item as menu_item_crud
+from app.crud.rollup import sales_rollup
 from app.schemas.order import (
-    OrderCreate, OrderUpdate, 
+    OrderCreate, OrderUpdate, OrderItemOp, OrderItemOperation,
     ReservationCreate, ReservationUpdate, OrderSummary
 )
 import uuid
+# Dialect inserts with on_conflict_do_update (ON CONFLICT ... DO UPDATE)
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 class CRUDReservation:
     def get(self, db: Session, id: int) -> Optional[Reservation]:
         return db.query(Reservation).filter(Reservation.id == id).first()
@@ -29,7 +40,7 @@ class CRUDReservation:
         if status:
             query = query.filter(Reservation.status == status)
         if date_filter:
-            query = query.filter(func.date(Reservation.reservation_datetime) == date_filter)
+            query = query.filter(on_wall_day(Reservation.reservation_datetime, date_filter))
         return query.offset(skip).limit(limit).all()
     def get_by_date_range(
         self, 
@@ -53,13 +64,16 @@ class CRUDReservation:
             customer_id=obj_in.customer_id,
             table_id=obj_in.table_id,
             reservation_datetime=obj_in.reservation_date,
+            estimated_end_time=obj_in.reservation_date + RESERVATION_DURATION,
             party_size=obj_in.party_size,
             special_requests=obj_in.special_requests,
             notes=obj_in.notes,
         )
         db.add(db_obj)
+        bump_reservation_version(db)
         db.commit()
         db.refresh(db_obj)
+        table_availability.apply([db_obj])
         
         # Update table status after creating reservation
         self._update_table_status_for_reservation(db, db_obj.id)
@@ -73,11 +87,15 @@ class CRUDReservation:
         # Map reservation_date to reservation_datetime for database field
         if 'reservation_date' in update_data:
             update_data['reservation_datetime'] = update_data.pop('reservation_date')
+            if update_data['reservation_datetime'] is not None:
+                update_data['estimated_end_time'] = update_data['reservation_datetime'] + RESERVATION_DURATION
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
+        bump_reservation_version(db)
         db.commit()
         db.refresh(db_obj)
+        table_availability.apply([db_obj])
         
         # Update table status after updating reservation
         self._update_table_status_for_reservation(db, db_obj.id)
@@ -95,16 +113,13 @@ class CRUDReservation:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Failed to update table status for reservation {reservation_id}: {e}")
-    def get_multi_with_details(
-        self, 
-        db: Session, 
-        skip: int = 0, 
-        limit: int = 100,
+    def _details_query(
+        self,
+        db: Session,
         status: Optional[ReservationStatus] = None,
         date_filter: Optional[date] = None
-    ) -> List[dict]:
-        """Get reservations with customer and table details"""
-        # Build base query with joins
+    ):
+        """Reservations joined with customer and table, with the listing filters applied"""
         query = db.query(
             Reservation,
             User.full_name.label('customer_name'),
@@ -119,8 +134,25 @@ class CRUDReservation:
         if status:
             query = query.filter(Reservation.status == status)
         if date_filter:
-            query = query.filter(func.date(Reservation.reservation_datetime) == date_filter)
-        results = query.order_by(Reservation.created_at.desc()).offset(skip).limit(limit).all()
+            query = query.filter(on_wall_day(Reservation.reservation_datetime, date_filter))
+        return query
+    def get_page_with_details(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[ReservationStatus] = None,
+        date_filter: Optional[date] = None,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.exact
+    ) -> Tuple[List[dict], Optional[int]]:
+        """One page of reservations with customer and table details, newest first, plus the total.
+        Pass ``cursor`` (from the previous page) instead of ``skip`` for keyset pagination."""
+        query = self._details_query(db, status=status, date_filter=date_filter)
+        results, total = fetch_page(
+            db, query, (Reservation.created_at, Reservation.id),
+            skip=skip, limit=limit, cursor=cursor, descending=True, count=count
+        )
         # Convert to dict format
         reservations_with_details = []
         for reservation, customer_name, customer_email, customer_phone, table_number, table_capacity, table_location in results:
@@ -145,6 +177,21 @@ class CRUDReservation:
                 "table_location": table_location
             }
             reservations_with_details.append(reservation_dict)
+        return reservations_with_details, total
+    def get_multi_with_details(
+        self, 
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        status: Optional[ReservationStatus] = None,
+        date_filter: Optional[date] = None,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Get reservations with customer and table details, newest first (no total)"""
+        reservations_with_details, _ = self.get_page_with_details(
+            db, skip=skip, limit=limit, status=status, date_filter=date_filter,
+            cursor=cursor, count=CountMode.none
+        )
         return reservations_with_details
     def get_count_with_details(
         self, 
@@ -153,15 +200,41 @@ class CRUDReservation:
         date_filter: Optional[date] = None
     ) -> int:
         """Get count of reservations with filters applied"""
-        query = db.query(Reservation)\
-            .outerjoin(User, Reservation.customer_id == User.id)\
-            .outerjoin(Table, Reservation.table_id == Table.id)
-        # Apply same filters as get_multi_with_details
-        if status:
-            query = query.filter(Reservation.status == status)
-        if date_filter:
-            query = query.filter(func.date(Reservation.reservation_datetime) == date_filter)
-        return query.count()
+        return self._details_query(db, status=status, date_filter=date_filter).count()
+    def export_statement(
+        self,
+        start_day: date,
+        end_day: date,
+        status: Optional[ReservationStatus] = None
+    ):
+        """Core SELECT of flat reservation rows booked for start_day..end_day, for streaming exports"""
+        statements = []
+        for model in reservation_sources(start_day):
+            statement = select(
+                model.id,
+                model.reservation_datetime,
+                model.estimated_end_time,
+                model.party_size,
+                model.status,
+                model.arrival_status,
+                model.actual_arrival_time,
+                model.customer_id,
+                User.full_name.label('customer_name'),
+                User.email.label('customer_email'),
+                User.phone.label('customer_phone'),
+                Table.table_number.label('table_number'),
+                model.special_requests,
+                model.created_at,
+            ).outerjoin(User, model.customer_id == User.id)\
+             .outerjoin(Table, model.table_id == Table.id)\
+             .where(between_wall_days(model.reservation_datetime, start_day, end_day))
+            if status:
+                statement = statement.where(model.status == status)
+            statements.append(statement)
+        if len(statements) == 1:
+            return statements[0].order_by(Reservation.reservation_datetime.asc(), Reservation.id.asc())
+        rows = union_all(*statements).subquery()
+        return select(rows).order_by(rows.c.reservation_datetime.asc(), rows.c.id.asc())
     def get_my_reservations_with_details(
         self, 
         db: Session, 
@@ -248,7 +321,9 @@ class CRUDReservation:
     def delete(self, db: Session, id: int) -> Reservation:
         obj = db.query(Reservation).get(id)
         db.delete(obj)
+        bump_reservation_version(db)
         db.commit()
+        table_availability.remove(id)
         return obj
 class CRUDOrder:
     def get(self, db: Session, id: int) -> Optional[Order]:
@@ -256,17 +331,176 @@ class CRUDOrder:
         return db.query(Order).options(
             joinedload(Order.order_items).joinedload(OrderItem.menu_item)
         ).filter(Order.id == id).first()
+    def get_version(self, db: Session, id: int) -> Optional[Tuple]:
+        """Cheap fingerprint of one order and its lines for ETags, without loading them.
+
+        Returns (customer_id, last_modified, fingerprint) or None if the order does not exist.
+        """
+        row = db.query(
+            Order.customer_id, Order.created_at, Order.updated_at,
+            func.count(OrderItem.id), func.max(OrderItem.id),
+            func.coalesce(func.sum(OrderItem.quantity), 0), func.coalesce(func.sum(OrderItem.total_price), 0),
+        ).outerjoin(OrderItem, OrderItem.order_id == Order.id).filter(
+            Order.id == id
+        ).group_by(Order.id, Order.customer_id, Order.created_at, Order.updated_at).first()
+        if row is None:
+            return None
+        customer_id, created_at, updated_at = row[0], row[1], row[2]
+        return customer_id, updated_at or created_at, tuple(row)
     def update_order_total(self, db: Session, order_id: int) -> Optional[Order]:
         """Update order total amount based on order items"""
         order = self.get(db, id=order_id)
         if not order:
             return None
         # Calculate total from order items
-        total = db.query(func.sum(OrderItem.subtotal)).filter(OrderItem.order_id == order_id).scalar() or 0
+        total = db.query(func.sum(OrderItem.total_price)).filter(OrderItem.order_id == order_id).scalar() or 0
         order.total_amount = total
         db.commit()
         db.refresh(order)
         return order
+    def add_item(
+        self,
+        db: Session,
+        order_id: int,
+        menu_item: MenuItem,
+        quantity: int = 1,
+        special_instructions: Optional[str] = ""
+    ) -> Tuple[int, int, bool]:
+        """Add a menu item to an order, merging with an existing line atomically.
+
+        Same write path as an ``add`` step of apply_item_operations: the order row
+        is locked, then the line upsert adds to its quantity in the database
+        (quantity + excluded.quantity) and the order totals are incremented in
+        place, so concurrent adds (web UI + chatbot PATCH) never lose an update.
+        Returns (item_id, new quantity, created).
+        """
+        self._lock_order(db, order_id)
+        items_table = OrderItem.__table__
+        dialect = db.get_bind().dialect
+        stmt = self._line_upsert(db, order_id, menu_item, quantity, special_instructions=special_instructions)
+        line_columns = (items_table.c.id, items_table.c.quantity, items_table.c.unit_price)
+        if dialect.full_returning:
+            item_id, new_quantity, unit_price = db.execute(stmt.returning(*line_columns)).one()
+        else:
+            # The order lock is held until commit, so this read sees our own write
+            db.execute(stmt)
+            item_id, new_quantity, unit_price = db.execute(
+                select(*line_columns).where(
+                    items_table.c.order_id == order_id, items_table.c.menu_item_id == menu_item.id
+                )
+            ).one()
+        # Increment (not recompute) the totals: the order lock serializes every line write
+        orders_table = Order.__table__
+        added = unit_price * quantity
+        new_total = func.coalesce(orders_table.c.total_amount, 0) + added
+        db.execute(
+            update(orders_table).where(orders_table.c.id == order_id).values(
+                total_amount=new_total, tax_amount=new_total * 0.1
+            )
+        )
+        db.commit()
+        return item_id, new_quantity, new_quantity == quantity
+    def _lock_order(self, db: Session, order_id: int) -> None:
+        """SELECT ... FOR UPDATE on the order row: serializes every line write to one order"""
+        orders_table = Order.__table__
+        db.execute(select(orders_table.c.id).where(orders_table.c.id == order_id).with_for_update())
+    def _line_upsert(
+        self,
+        db: Session,
+        order_id: int,
+        menu_item: MenuItem,
+        quantity: int,
+        special_instructions: Optional[str] = "",
+        relative: bool = True,
+        overwrite_instructions: bool = False
+    ):
+        """INSERT ... ON CONFLICT (order_id, menu_item_id) DO UPDATE for one order line.
+
+        ``relative`` adds ``quantity`` to an existing line in the database
+        (quantity + excluded.quantity); otherwise the line is set to ``quantity``.
+        An existing line keeps its unit_price.
+        """
+        items_table = OrderItem.__table__
+        stmt = _UPSERT_INSERTS[db.get_bind().dialect.name](items_table).values(
+            order_id=order_id,
+            menu_item_id=menu_item.id,
+            quantity=quantity,
+            unit_price=menu_item.price,
+            total_price=menu_item.price * quantity,
+            special_instructions=special_instructions
+        )
+        new_quantity = items_table.c.quantity + stmt.excluded.quantity if relative else stmt.excluded.quantity
+        set_ = {
+            "quantity": new_quantity,
+            "total_price": new_quantity * items_table.c.unit_price,
+        }
+        if overwrite_instructions:
+            set_["special_instructions"] = stmt.excluded.special_instructions
+        return stmt.on_conflict_do_update(
+            index_elements=[items_table.c.order_id, items_table.c.menu_item_id],
+            set_=set_
+        )
+    def apply_item_operations(
+        self,
+        db: Session,
+        order: Order,
+        operations: List[OrderItemOperation],
+        menu_items: Dict[int, MenuItem]
+    ) -> Order:
+        """Apply add / set_quantity / remove steps to ``order`` in one transaction.
+
+        The order row is locked first, so concurrent PATCHes and item adds are
+        serialized. Steps are folded per menu item into either a relative add or an
+        absolute quantity; both are written with the ON CONFLICT line upsert (adds
+        as quantity + excluded.quantity), quantity 0 deletes the line, and the
+        totals are recomputed in SQL from the order's lines. ``menu_items`` must
+        hold every item an add/set_quantity step names.
+        """
+        self._lock_order(db, order.id)
+        # menu_item_id -> ("add", delta) or ("set", quantity)
+        effects: Dict[int, Tuple[str, int]] = {}
+        instructions: Dict[int, str] = {}
+        for operation in operations:
+            kind, amount = effects.get(operation.menu_item_id, ("add", 0))
+            if operation.op == OrderItemOp.add:
+                effects[operation.menu_item_id] = (kind, amount + operation.quantity)
+            elif operation.op == OrderItemOp.set_quantity:
+                effects[operation.menu_item_id] = ("set", operation.quantity)
+            else:
+                effects[operation.menu_item_id] = ("set", 0)
+            if operation.special_instructions is not None:
+                instructions[operation.menu_item_id] = operation.special_instructions
+
+        items_table = OrderItem.__table__
+        delete_ids = [menu_item_id for menu_item_id, (kind, amount) in effects.items() if kind == "set" and amount <= 0]
+        if delete_ids:
+            db.execute(delete(items_table).where(
+                items_table.c.order_id == order.id, items_table.c.menu_item_id.in_(delete_ids)
+            ))
+        for menu_item_id, (kind, amount) in effects.items():
+            if kind == "set" and amount <= 0:
+                continue
+            menu_item = menu_items.get(menu_item_id)
+            if not menu_item:
+                raise ValueError(f"Menu item {menu_item_id} not found in database")
+            db.execute(self._line_upsert(
+                db, order.id, menu_item, amount,
+                special_instructions=instructions.get(menu_item_id, ""),
+                relative=kind == "add",
+                overwrite_instructions=menu_item_id in instructions
+            ))
+
+        orders_table = Order.__table__
+        line_total = select(func.coalesce(func.sum(items_table.c.total_price), 0.0)).where(
+            items_table.c.order_id == order.id
+        ).scalar_subquery()
+        db.execute(update(orders_table).where(orders_table.c.id == order.id).values(
+            total_amount=line_total, tax_amount=line_total * 0.1
+        ))
+        db.commit()
+        # The Core statements bypassed the identity map; reload the order and lines on next access
+        db.expire(order)
+        return order
     def get_by_order_number(self, db: Session, order_number: str) -> Optional[Order]:
         return db.query(Order).filter(Order.order_number == order_number).first()
     def get_multi(
@@ -284,20 +518,17 @@ class CRUDOrder:
         if status:
             query = query.filter(Order.status == status)
         if date_filter:
-            query = query.filter(func.date(Order.created_at) == date_filter)
+            query = query.filter(on_day(Order.created_at, date_filter))
         return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    def get_multi_with_details(
-        self, 
-        db: Session, 
-        skip: int = 0, 
-        limit: int = 100,
+    def _details_query(
+        self,
+        db: Session,
         customer_id: Optional[int] = None,
         status: Optional[OrderStatus] = None,
         date_filter: Optional[date] = None,
         search: Optional[str] = None
-    ) -> List[dict]:
-        """Get orders with customer and table details"""
-        # Build base query with joins
+    ):
+        """Orders joined with customer and table, with the listing filters applied"""
         query = db.query(
             Order,
             User.full_name.label('customer_name'),
@@ -311,7 +542,7 @@ class CRUDOrder:
         if status:
             query = query.filter(Order.status == status)
         if date_filter:
-            query = query.filter(func.date(Order.created_at) == date_filter)
+            query = query.filter(on_day(Order.created_at, date_filter))
         if search:
             query = query.filter(
                 Order.order_number.ilike(f"%{search}%") |
@@ -319,7 +550,28 @@ class CRUDOrder:
                 User.email.ilike(f"%{search}%") |
                 Table.table_number.ilike(f"%{search}%")
             )
-        results = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        return query
+    def get_page_with_details(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        customer_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        date_filter: Optional[date] = None,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.exact
+    ) -> Tuple[List[dict], Optional[int]]:
+        """One page of orders with customer and table details, newest first, plus the total.
+        Pass ``cursor`` (from the previous page) instead of ``skip`` for keyset pagination."""
+        query = self._details_query(
+            db, customer_id=customer_id, status=status, date_filter=date_filter, search=search
+        )
+        results, total = fetch_page(
+            db, query, (Order.created_at, Order.id),
+            skip=skip, limit=limit, cursor=cursor, descending=True, count=count
+        )
         # Convert to dict format
         orders_with_details = []
         for order, customer_name, customer_email, table_number in results:
@@ -341,6 +593,23 @@ class CRUDOrder:
                 "order_items": []  # Will be populated separately if needed
             }
             orders_with_details.append(order_dict)
+        return orders_with_details, total
+    def get_multi_with_details(
+        self, 
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        customer_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        date_filter: Optional[date] = None,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Get orders with customer and table details, newest first (no total)"""
+        orders_with_details, _ = self.get_page_with_details(
+            db, skip=skip, limit=limit, customer_id=customer_id, status=status,
+            date_filter=date_filter, search=search, cursor=cursor, count=CountMode.none
+        )
         return orders_with_details
     def get_count_with_details(
         self, 
@@ -351,72 +620,116 @@ class CRUDOrder:
         search: Optional[str] = None
     ) -> int:
         """Get count of orders with filters applied"""
-        # Build base query with joins
-        query = db.query(Order)\
-            .outerjoin(User, Order.customer_id == User.id)\
-            .outerjoin(Table, Order.table_id == Table.id)
-        # Apply same filters as get_multi_with_details
-        if customer_id:
-            query = query.filter(Order.customer_id == customer_id)
-        if status:
-            query = query.filter(Order.status == status)
-        if date_filter:
-            query = query.filter(func.date(Order.created_at) == date_filter)
-        if search:
-            query = query.filter(
-                Order.order_number.ilike(f"%{search}%") |
-                User.full_name.ilike(f"%{search}%") |
-                User.email.ilike(f"%{search}%") |
-                Table.table_number.ilike(f"%{search}%")
-            )
-        return query.count()
-    def create(self, db: Session, obj_in: OrderCreate) -> Order:
+        return self._details_query(
+            db, customer_id=customer_id, status=status, date_filter=date_filter, search=search
+        ).count()
+    def export_statement(
+        self,
+        start_day: date,
+        end_day: date,
+        status: Optional[OrderStatus] = None
+    ):
+        """Core SELECT of flat order rows created start_day..end_day, for streaming exports"""
+        statements = []
+        for model, _ in order_sources(start_day):
+            statement = select(
+                model.id,
+                model.order_number,
+                model.created_at,
+                model.status,
+                model.payment_status,
+                model.payment_method,
+                model.payment_date,
+                model.customer_id,
+                User.full_name.label('customer_name'),
+                User.email.label('customer_email'),
+                Table.table_number.label('table_number'),
+                model.total_amount,
+                model.tax_amount,
+                model.discount_amount,
+            ).outerjoin(User, model.customer_id == User.id)\
+             .outerjoin(Table, model.table_id == Table.id)\
+             .where(between_days(model.created_at, start_day, end_day))
+            if status:
+                statement = statement.where(model.status == status)
+            statements.append(statement)
+        if len(statements) == 1:
+            # Walks ix_orders_created_at_id in order, so the first rows stream out immediately
+            return statements[0].order_by(Order.created_at.asc(), Order.id.asc())
+        # Range reaches into the archive: hot and archived rows merged in one ordered stream
+        rows = union_all(*statements).subquery()
+        return select(rows).order_by(rows.c.created_at.asc(), rows.c.id.asc())
+    def create(
+        self,
+        db: Session,
+        obj_in: OrderCreate,
+        menu_items: Optional[Dict[int, MenuItem]] = None
+    ) -> Order:
+        """Create an order with its items in a constant number of queries.
+
+        ``menu_items`` (id -> MenuItem) may be passed in when the caller already loaded
+        them for validation; otherwise they are loaded here in one IN (...) query.
+        """
         # Generate unique order number
         order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
         print(f"🔍 Debug CRUD: Creating order with customer_id={obj_in.customer_id}, table_id={obj_in.table_id}")
         print(f"🔍 Debug CRUD: Order items count: {len(obj_in.order_items)}")
+        lines = {}
+        for item in obj_in.order_items:
+            # Handle both dict and object formats
+            if isinstance(item, dict):
+                menu_item_id, quantity, special_instructions = (
+                    item.get('menu_item_id'), item.get('quantity'), item.get('special_instructions', '')
+                )
+            else:
+                menu_item_id, quantity, special_instructions = (
+                    item.menu_item_id, item.quantity, item.special_instructions or ''
+                )
+            # One line per dish (unique order_id, menu_item_id): repeated dishes are merged
+            if menu_item_id in lines:
+                _, merged_quantity, merged_instructions = lines[menu_item_id]
+                lines[menu_item_id] = (menu_item_id, merged_quantity + quantity, merged_instructions or special_instructions)
+            else:
+                lines[menu_item_id] = (menu_item_id, quantity, special_instructions)
+        lines = list(lines.values())
+        if menu_items is None:
+            menu_items = menu_item_crud.get_many(db, ids=[menu_item_id for menu_item_id, _, _ in lines])
+        # Price every line and total the order in one pass, before anything is written
+        total_amount = 0.0
+        item_rows = []
+        for menu_item_id, quantity, special_instructions in lines:
+            menu_item = menu_items.get(menu_item_id)
+            if not menu_item:
+                raise ValueError(f"Menu item {menu_item_id} not found in database")
+            item_total = menu_item.price * quantity
+            total_amount += item_total
+            item_rows.append({
+                "menu_item_id": menu_item_id,
+                "quantity": quantity,
+                "unit_price": menu_item.price,
+                "total_price": item_total,
+                "special_instructions": special_instructions,
+            })
+        # Calculate tax (10% for example)
+        tax_amount = total_amount * 0.1
+        print(f"🔍 Debug CRUD: Total amount={total_amount}, tax={tax_amount}")
         db_obj = Order(
             order_number=order_number,
             customer_id=obj_in.customer_id,
             table_id=obj_in.table_id,
             notes=obj_in.notes,
+            total_amount=total_amount,
+            tax_amount=tax_amount,
         )
         db.add(db_obj)
         db.flush()  # To get the order ID
         print(f"✅ Order flushed with ID: {db_obj.id}")
-        # Add order items
-        total_amount = 0.0
-        for i, item in enumerate(obj_in.order_items):
-            # Handle both dict and object formats
-            menu_item_id = item.get('menu_item_id') if isinstance(item, dict) else item.menu_item_id
-            quantity = item.get('quantity') if isinstance(item, dict) else item.quantity
-            special_instructions = item.get('special_instructions', '') if isinstance(item, dict) else (item.special_instructions or '')
-            print(f"🔍 Debug CRUD: Processing item {i+1}: menu_item_id={menu_item_id}, quantity={quantity}")
-            menu_item = db.query(MenuItem).filter(MenuItem.id == menu_item_id).first()
-            if not menu_item:
-                db.rollback()
-                raise ValueError(f"Menu item {menu_item_id} not found in database")
-            print(f"✅ Found menu item: {menu_item.name} (price: {menu_item.price})")
-            item_total = menu_item.price * quantity
-            total_amount += item_total
-            order_item = OrderItem(
-                order_id=db_obj.id,
-                menu_item_id=menu_item_id,
-                quantity=quantity,
-                unit_price=menu_item.price,
-                total_price=item_total,
-                special_instructions=special_instructions,
-            )
-            db.add(order_item)
-            print(f"✅ Order item added: {menu_item.name} x{quantity} = {item_total}")
-        # Calculate tax (10% for example)
-        tax_amount = total_amount * 0.1
-        db_obj.total_amount = total_amount
-        db_obj.tax_amount = tax_amount
-        print(f"🔍 Debug CRUD: Total amount={total_amount}, tax={tax_amount}")
+        # One executemany INSERT for all lines
+        if item_rows:
+            db.execute(insert(OrderItem), [{**row, "order_id": db_obj.id} for row in item_rows])
         db.commit()
         db.refresh(db_obj)
-        print(f"✅ Order committed: {order_number}")
+        print(f"✅ Order committed: {order_number} ({len(item_rows)} items)")
         return db_obj
     def update(self, db: Session, db_obj: Order, obj_in: OrderUpdate) -> Order:
         update_data = obj_in.dict(exclude_unset=True)
@@ -432,6 +745,9 @@ class CRUDOrder:
     def delete(self, db: Session, id: int) -> Order:
         obj = db.query(Order).get(id)
         db.delete(obj)
+        db.flush()
+        # The watermark catch-up can't see deleted rows; recompute that day now
+        sales_rollup.refresh_order_day(db, obj)
         db.commit()
         return obj
     def get_with_details(self, db: Session, order_id: int) -> Optional[dict]:
@@ -487,33 +803,48 @@ class CRUDOrder:
             "order_items": items_data
         }
     def get_dashboard_stats(self, db: Session) -> dict:
-        """Get comprehensive dashboard statistics"""
-        today = date.today()
-        # Order statistics
-        total_orders = db.query(Order).count()
-        pending_orders = db.query(Order).filter(Order.status == OrderStatus.pending).count()
-        completed_orders = db.query(Order).filter(Order.status == OrderStatus.completed).count()
-        # Revenue (completed orders only)
-        revenue_result = db.query(func.sum(Order.total_amount)).filter(
-            Order.status == OrderStatus.completed,
-            func.date(Order.created_at) == today
-        ).scalar()
-        total_revenue = float(revenue_result) if revenue_result else 0.0
-        # Table statistics
-        total_tables = db.query(Table).count()
-        available_tables = db.query(Table).filter(Table.status == TableStatus.available).count()
-        occupied_tables = db.query(Table).filter(Table.status == TableStatus.occupied).count()
-        reserved_tables = db.query(Table).filter(Table.status == TableStatus.reserved).count()
-        # User statistics
-        total_customers = db.query(User).filter(User.role == UserRole.customer).count()
-        total_staff = db.query(User).filter(User.role.in_([UserRole.staff, UserRole.manager, UserRole.admin])).count()
-        # Menu statistics
-        total_menu_items = db.query(MenuItem).count()
-        available_menu_items = db.query(MenuItem).filter(MenuItem.is_available == True).count()
-        # Reservation statistics
-        total_reservations = db.query(Reservation).count()
-        pending_reservations = db.query(Reservation).filter(Reservation.status == ReservationStatus.pending).count()
-        confirmed_reservations = db.query(Reservation).filter(Reservation.status == ReservationStatus.confirmed).count()
+        """Get comprehensive dashboard statistics.
+
+        All scalar counters come from one statement: a single-row aggregate per table
+        using COUNT(*) FILTER (WHERE ...), cross-joined; the three lists add one query each.
+        """
+        today = restaurant_today()
+        order_stats = select(
+            func.count().label('total_orders'),
+            func.count().filter(Order.status == OrderStatus.pending).label('pending_orders'),
+            func.count().filter(Order.status == OrderStatus.completed).label('completed_orders'),
+            # Revenue (completed orders only), from the hourly rollup
+            sales_rollup.completed_revenue(today).label('total_revenue'),
+        ).select_from(Order).subquery()
+        table_stats = select(
+            func.count().label('total_tables'),
+            func.count().filter(Table.status == TableStatus.available).label('available_tables'),
+            func.count().filter(Table.status == TableStatus.occupied).label('occupied_tables'),
+            func.count().filter(Table.status == TableStatus.reserved).label('reserved_tables'),
+        ).select_from(Table).subquery()
+        user_stats = select(
+            func.count().filter(User.role == UserRole.customer).label('total_customers'),
+            func.count().filter(
+                User.role.in_([UserRole.staff, UserRole.manager, UserRole.admin])
+            ).label('total_staff'),
+        ).select_from(User).subquery()
+        menu_stats = select(
+            func.count().label('total_menu_items'),
+            func.count().filter(MenuItem.is_available == True).label('available_menu_items'),
+        ).select_from(MenuItem).subquery()
+        reservation_stats = select(
+            func.count().label('total_reservations'),
+            func.count().filter(Reservation.status == ReservationStatus.pending).label('pending_reservations'),
+            func.count().filter(Reservation.status == ReservationStatus.confirmed).label('confirmed_reservations'),
+        ).select_from(Reservation).subquery()
+        counters = db.execute(
+            select(order_stats, table_stats, user_stats, menu_stats, reservation_stats).select_from(
+                order_stats.join(table_stats, true())
+                .join(user_stats, true())
+                .join(menu_stats, true())
+                .join(reservation_stats, true())
+            )
+        ).mappings().one()
         # Recent orders (last 5)
         recent_orders = db.query(
             Order.id,
@@ -541,7 +872,7 @@ class CRUDOrder:
         # Recent reservations (last 5)
         recent_reservations = db.query(
             Reservation.id,
-            Reservation.reservation_datetimetime,
+            Reservation.reservation_datetime,
             Reservation.party_size,
             Reservation.status,
             User.full_name.label('customer_name'),
@@ -554,7 +885,7 @@ class CRUDOrder:
         for res_data in recent_reservations:
             recent_reservations_data.append({
                 'id': res_data.id,
-                'reservation_datetime': res_data.reservation_datetimetime.isoformat(),
+                'reservation_datetime': res_data.reservation_datetime.isoformat(),
                 'party_size': res_data.party_size,
                 'status': res_data.status,
                 'customer_name': res_data.customer_name,
@@ -579,40 +910,17 @@ class CRUDOrder:
                 'total_ordered': item_data.total_ordered
             })
         return {
-            'total_orders': total_orders,
-            'pending_orders': pending_orders,
-            'completed_orders': completed_orders,
-            'total_revenue': total_revenue,
-            'total_tables': total_tables,
-            'available_tables': available_tables,
-            'occupied_tables': occupied_tables,
-            'reserved_tables': reserved_tables,
-            'total_customers': total_customers,
-            'total_staff': total_staff,
-            'total_menu_items': total_menu_items,
-            'available_menu_items': available_menu_items,
-            'total_reservations': total_reservations,
-            'pending_reservations': pending_reservations,
-            'confirmed_reservations': confirmed_reservations,
+            **counters,
+            'total_revenue': float(counters['total_revenue'] or 0.0),
             'recent_orders': recent_orders_data,
             'recent_reservations': recent_reservations_data,
             'popular_items': popular_items_data
         }
     def get_daily_summary(self, db: Session, target_date: Optional[date] = None) -> OrderSummary:
+        """Order counts and paid revenue for one restaurant-local day, from the sales rollup"""
         if not target_date:
-            target_date = date.today()
-        # Get orders for the specific date
-        orders = db.query(Order).filter(func.date(Order.created_at) == target_date).all()
-        total_orders = len(orders)
-        pending_orders = len([o for o in orders if o.status == OrderStatus.pending])
-        completed_orders = len([o for o in orders if o.status == OrderStatus.completed])
-        total_revenue = sum([o.total_amount for o in orders if o.payment_status == PaymentStatus.paid])
-        return OrderSummary(
-            total_orders=total_orders,
-            pending_orders=pending_orders,
-            completed_orders=completed_orders,
-            total_revenue=total_revenue
-        )
+            target_date = restaurant_today()
+        return OrderSummary(**sales_rollup.daily_summary(db, target_date))
 class CRUDOrderItem:
     def get(self, db: Session, id: int) -> Optional[OrderItem]:
         return db.query(OrderItem).filter(OrderItem.id == id).first()
@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination helpers
+Phân trang theo con trỏ (created_at, id) / (name, id): trang sâu không chậm dần như OFFSET
+Trang + tổng số dòng trong một câu lệnh (COUNT(*) OVER ()), hoặc ước lượng / bỏ qua tổng
+"""
+import base64
+import json
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, func, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class CountMode(str, Enum):
+    """How a paginated listing computes ``total``"""
+    exact = "exact"        # COUNT(*) OVER () in the page query
+    estimate = "estimate"  # planner row estimate (PostgreSQL), exact elsewhere
+    none = "none"          # skip the count (infinite scroll)
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or does not belong to this listing"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor for the sort-key values of the last row on a page"""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return tuple(_decode_value(value) for value in values)
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+
+def keyset_page(query, columns: Sequence, cursor: Optional[str], descending: bool = False):
+    """Order ``query`` by ``columns`` and start after ``cursor`` (all columns sorted the same way).
+
+    Uses a row-value comparison, so a composite index on ``columns`` serves any
+    page depth with a single range scan.
+    """
+    if cursor:
+        after = decode_cursor(cursor, len(columns))
+        key = tuple_(*columns)
+        bound = tuple_(*(bindparam(None, value, type_=column.type) for column, value in zip(columns, after)))
+        query = query.filter(key < bound if descending else key > bound)
+    return query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+
+
+def keyset_slice(rows: Sequence, cursor: Optional[str], limit: int, key) -> list:
+    """Keyset page over an in-memory list already in sort order (e.g. the menu catalog).
+
+    Resumes right after the row whose key equals the cursor; if that row is gone,
+    after the first row that sorts above it.
+    """
+    start = 0
+    if cursor and rows:
+        after = decode_cursor(cursor, len(key(rows[0])))
+        keys = [tuple(key(row)) for row in rows]
+        if after in keys:
+            start = keys.index(after) + 1
+        else:
+            start = next((i for i, row_key in enumerate(keys) if row_key > after), len(rows))
+    return list(rows[start:start + limit])
+
+
+def next_cursor(rows: Sequence, limit: int, key) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None when this page was not full"""
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor(key(rows[-1]))
+
+
+def estimate_count(db: Session, query) -> Optional[int]:
+    """Planner row estimate for ``query`` via EXPLAIN; None if the database can't give one"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    # Named paramstyle so the statement can be re-bound as text() with the original types
+    compiled = query.order_by(None).statement.compile(dialect=postgresql.dialect(paramstyle="named"))
+    explain = text("EXPLAIN (FORMAT JSON) " + str(compiled)).bindparams(
+        *(bindparam(key, value, type_=compiled.binds[key].type) for key, value in compiled.params.items())
+    )
+    try:
+        plan = db.execute(explain).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Không ước lượng được số dòng: {e}")
+        return None
+
+
+def fetch_page(
+    db: Session,
+    query,
+    columns: Sequence = (),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    count: CountMode = CountMode.exact,
+) -> Tuple[List[Any], Optional[int]]:
+    """One page of a filtered ``query`` plus the total row count, in one round trip where possible.
+
+    ``columns`` is the keyset sort key (see keyset_page); without it rows keep the
+    query's own order and ``cursor`` is not supported. In exact mode the total rides
+    along as ``COUNT(*) OVER ()``; a second COUNT is only issued when the window
+    can't see the whole result (a cursor page, or an offset past the last row).
+    """
+    single_entity = len(query.column_descriptions) == 1
+    page_query = keyset_page(query, columns, cursor, descending) if columns else query
+    if not cursor:
+        page_query = page_query.offset(skip)
+
+    total = None
+    if count == CountMode.estimate:
+        total = estimate_count(db, query)
+        if total is None:
+            count = CountMode.exact
+
+    windowed = count == CountMode.exact and not cursor
+    if windowed:
+        page_query = page_query.add_columns(func.count().over().label("total_count"))
+    rows = page_query.limit(limit).all()
+
+    if windowed:
+        if rows:
+            total = rows[0][-1]
+            rows = [row[0] if single_entity else tuple(row)[:-1] for row in rows]
+        elif skip == 0:
+            total = 0
+    if count == CountMode.exact and total is None:
+        total = query.order_by(None).count()
+    return rows, total
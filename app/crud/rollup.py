@@ -0,0 +1,176 @@
+"""
+Sales rollups: order counts / revenue per hour and quantities per menu item per day
+Báo cáo doanh thu đọc từ bảng tổng hợp; chỉ tính lại những ngày có đơn thay đổi (theo watermark)
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.crud.archive import order_sources
+from app.crud.filters import on_day, restaurant_tz
+from app.models.archive import OrderArchive
+from app.models.order import Order, OrderItem, OrderStatus, PaymentStatus
+from app.models.rollup import MenuItemDailyRollup, RollupWatermark, SalesHourlyRollup
+
+WATERMARK_NAME = "sales"
+# PostgreSQL stamps now() at transaction start, so a slow transaction can commit a
+# change dated before the watermark; re-scan this far back (recomputing a day is idempotent)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# Orders counted as sold in the per-item rollup (same set /analytics/bestsellers always used)
+BESTSELLER_STATUSES = (OrderStatus.completed, OrderStatus.preparing, OrderStatus.ready)
+# Arbitrary key for pg_try_advisory_xact_lock; one catch-up at a time across workers
+ROLLUP_LOCK_KEY = 72_531_021
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _local(value: datetime) -> datetime:
+    return _aware(value).astimezone(restaurant_tz())
+
+
+class CRUDSalesRollup:
+    def refresh_days(self, db: Session, days: Iterable[date]) -> None:
+        """Recompute the rollup rows of ``days`` from orders (caller commits)"""
+        days = sorted(set(days))
+        if not days:
+            return
+        db.execute(delete(SalesHourlyRollup.__table__).where(SalesHourlyRollup.day.in_(days)))
+        db.execute(delete(MenuItemDailyRollup.__table__).where(MenuItemDailyRollup.day.in_(days)))
+
+        hourly_rows, item_rows = [], []
+        for day in days:
+            buckets, quantities = {}, {}
+            # Days before the archive horizon may have orders in both the hot and the archive tables
+            for order_model, item_model in order_sources(day):
+                orders = db.query(
+                    order_model.created_at, order_model.status, order_model.payment_status, order_model.total_amount
+                ).filter(on_day(order_model.created_at, day))
+                for created_at, status, payment_status, total_amount in orders:
+                    hour = _local(created_at).hour
+                    bucket = buckets.setdefault(hour, {
+                        "day": day, "hour": hour, "order_count": 0, "pending_count": 0, "completed_count": 0,
+                        "completed_revenue": 0.0, "paid_count": 0, "paid_revenue": 0.0,
+                    })
+                    bucket["order_count"] += 1
+                    if status == OrderStatus.pending:
+                        bucket["pending_count"] += 1
+                    if status == OrderStatus.completed:
+                        bucket["completed_count"] += 1
+                        bucket["completed_revenue"] += total_amount or 0.0
+                    if payment_status == PaymentStatus.paid:
+                        bucket["paid_count"] += 1
+                        bucket["paid_revenue"] += total_amount or 0.0
+
+                items = db.query(
+                    item_model.menu_item_id, func.sum(item_model.quantity), func.count(item_model.id)
+                ).join(order_model, item_model.order_id == order_model.id).filter(
+                    on_day(order_model.created_at, day), order_model.status.in_(BESTSELLER_STATUSES)
+                ).group_by(item_model.menu_item_id)
+                for menu_item_id, quantity, line_count in items:
+                    row = quantities.setdefault(menu_item_id, {
+                        "day": day, "menu_item_id": menu_item_id, "quantity": 0, "line_count": 0,
+                    })
+                    row["quantity"] += quantity
+                    row["line_count"] += line_count
+            hourly_rows.extend(buckets.values())
+            item_rows.extend(quantities.values())
+
+        if hourly_rows:
+            db.execute(insert(SalesHourlyRollup.__table__), hourly_rows)
+        if item_rows:
+            db.execute(insert(MenuItemDailyRollup.__table__), item_rows)
+
+    def refresh_order_day(self, db: Session, order: Order) -> None:
+        """Recompute the day ``order`` belongs to (e.g. before deleting it; caller commits)"""
+        if order.created_at is not None:
+            self.refresh_days(db, [_local(order.created_at).date()])
+
+    def catch_up(self, db: Session, full: bool = False) -> Optional[List[date]]:
+        """Fold orders created/updated since the watermark into the rollups and commit.
+
+        Returns the days recomputed, or None if another worker is already catching up.
+        ``full`` ignores the watermark and rebuilds every day that has orders.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY}).scalar():
+                return None
+
+        watermark = None if full else db.query(RollupWatermark.watermark).filter(
+            RollupWatermark.name == WATERMARK_NAME
+        ).scalar()
+        changes = db.query(Order.created_at, Order.updated_at)
+        if watermark is not None:
+            since = _aware(watermark) - WATERMARK_OVERLAP
+            changes = changes.filter(or_(Order.created_at > since, Order.updated_at > since))
+        else:
+            # A rebuild also covers archived days; archived orders never change afterwards
+            changes = changes.union_all(db.query(OrderArchive.created_at, OrderArchive.updated_at))
+
+        days = set()
+        latest = _aware(watermark) if watermark is not None else None
+        for created_at, updated_at in changes:
+            if created_at is None:
+                continue
+            days.add(_local(created_at).date())
+            changed = max(_aware(value) for value in (created_at, updated_at) if value is not None)
+            if latest is None or changed > latest:
+                latest = changed
+
+        if full:
+            db.execute(delete(SalesHourlyRollup.__table__))
+            db.execute(delete(MenuItemDailyRollup.__table__))
+        self.refresh_days(db, days)
+        if latest is not None:
+            updated = db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).update(
+                {RollupWatermark.watermark: latest}, synchronize_session=False
+            )
+            if not updated:
+                db.add(RollupWatermark(name=WATERMARK_NAME, watermark=latest))
+        db.commit()
+        return sorted(days)
+
+    def daily_summary(self, db: Session, day: date) -> dict:
+        """total_orders / pending_orders / completed_orders / total_revenue (paid) for one day"""
+        row = db.query(
+            func.coalesce(func.sum(SalesHourlyRollup.order_count), 0),
+            func.coalesce(func.sum(SalesHourlyRollup.pending_count), 0),
+            func.coalesce(func.sum(SalesHourlyRollup.completed_count), 0),
+            func.coalesce(func.sum(SalesHourlyRollup.paid_revenue), 0.0),
+        ).filter(SalesHourlyRollup.day == day).one()
+        return {
+            "total_orders": row[0],
+            "pending_orders": row[1],
+            "completed_orders": row[2],
+            "total_revenue": float(row[3]),
+        }
+
+    def hourly(self, db: Session, day: date) -> List[SalesHourlyRollup]:
+        return db.query(SalesHourlyRollup).filter(
+            SalesHourlyRollup.day == day
+        ).order_by(SalesHourlyRollup.hour.asc()).all()
+
+    def completed_revenue(self, day: date):
+        """Scalar subquery: revenue of completed orders on ``day`` (for composing into one statement)"""
+        return select(
+            func.coalesce(func.sum(SalesHourlyRollup.completed_revenue), 0.0)
+        ).where(SalesHourlyRollup.day == day).scalar_subquery()
+
+    def bestsellers(self, db: Session, start_day: date, end_day: date, limit: int = 10) -> list:
+        """(menu_item_id, total_quantity, order_count) over [start_day, end_day], most sold first"""
+        total_quantity = func.sum(MenuItemDailyRollup.quantity)
+        return db.query(
+            MenuItemDailyRollup.menu_item_id,
+            total_quantity.label('total_quantity'),
+            func.sum(MenuItemDailyRollup.line_count).label('order_count'),
+        ).filter(
+            MenuItemDailyRollup.day >= start_day,
+            MenuItemDailyRollup.day <= end_day,
+        ).group_by(MenuItemDailyRollup.menu_item_id).order_by(total_quantity.desc()).limit(limit).all()
+
+
+sales_rollup = CRUDSalesRollup()
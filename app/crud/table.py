@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import Optional, List
+from sqlalchemy import and_, or_, func
+from typing import Optional, List, Tuple
 from datetime import datetime, timedelta
 from app.models.table import Table, TableStatus
+from app.core.availability import table_availability
+from app.core.business_hours import BusinessHours
+from app.crud.pagination import CountMode, fetch_page
 from app.schemas.table import TableCreate, TableUpdate
 
 
@@ -13,15 +16,13 @@ class CRUDTable:
     def get_by_table_number(self, db: Session, table_number: str) -> Optional[Table]:
         return db.query(Table).filter(Table.table_number == table_number).first()
 
-    def get_multi(
-        self, 
-        db: Session, 
-        skip: int = 0, 
-        limit: int = 100,
+    def _filtered_query(
+        self,
+        db: Session,
         active_only: bool = True,
         status: Optional[TableStatus] = None,
         search: Optional[str] = None
-    ) -> List[Table]:
+    ):
         query = db.query(Table)
         if active_only:
             query = query.filter(Table.is_active == True)
@@ -32,8 +33,34 @@ class CRUDTable:
                 Table.table_number.ilike(f"%{search}%") |
                 Table.location.ilike(f"%{search}%")
             )
+        return query
+
+    def get_multi(
+        self, 
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        active_only: bool = True,
+        status: Optional[TableStatus] = None,
+        search: Optional[str] = None
+    ) -> List[Table]:
+        query = self._filtered_query(db, active_only=active_only, status=status, search=search)
         return query.offset(skip).limit(limit).all()
 
+    def get_page(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        active_only: bool = True,
+        status: Optional[TableStatus] = None,
+        search: Optional[str] = None,
+        count: CountMode = CountMode.exact
+    ) -> Tuple[List[Table], Optional[int]]:
+        """A page of tables and the filtered total in one query (see fetch_page)"""
+        query = self._filtered_query(db, active_only=active_only, status=status, search=search)
+        return fetch_page(db, query, skip=skip, limit=limit, count=count)
+
     def count(
         self, 
         db: Session, 
@@ -41,17 +68,15 @@ class CRUDTable:
         status: Optional[TableStatus] = None,
         search: Optional[str] = None
     ) -> int:
-        query = db.query(Table)
-        if active_only:
-            query = query.filter(Table.is_active == True)
-        if status:
-            query = query.filter(Table.status == status)
-        if search:
-            query = query.filter(
-                Table.table_number.ilike(f"%{search}%") |
-                Table.location.ilike(f"%{search}%")
-            )
-        return query.count()
+        return self._filtered_query(db, active_only=active_only, status=status, search=search).count()
+
+    def get_version(self, db: Session) -> Tuple:
+        """Cheap fingerprint of the tables board for ETags: (count, max id, last change)"""
+        count, max_id, max_updated, max_created = db.query(
+            func.count(Table.id), func.max(Table.id), func.max(Table.updated_at), func.max(Table.created_at)
+        ).one()
+        last_modified = max(filter(None, (max_updated, max_created)), default=None)
+        return count, max_id, last_modified
 
     def get_available_tables(
         self, db: Session, min_capacity: Optional[int] = None,
@@ -73,6 +98,11 @@ class CRUDTable:
             # Calculate time window (reservation + duration)
             end_time = reservation_datetime + timedelta(hours=duration_hours)
             
+            # Conflicts from the in-memory interval index; SQL below when it can't answer
+            busy = table_availability.busy_table_ids(db, reservation_datetime, end_time)
+            if busy is not None:
+                return [table for table in query.all() if table.id not in busy]
+            
             # Find tables with conflicting reservations
             conflicting_reservations = db.query(Reservation.table_id).filter(
                 and_(
@@ -114,6 +144,9 @@ class CRUDTable:
         from app.models.order import Reservation, ReservationStatus
         
         end_time = reservation_datetime + timedelta(hours=duration_hours)
+        busy = table_availability.busy_table_ids(db, reservation_datetime, end_time)
+        if busy is not None:
+            return table_id not in busy
         
         conflicting_count = db.query(Reservation).filter(
             and_(
@@ -138,6 +171,36 @@ class CRUDTable:
         
         return conflicting_count == 0
 
+    def suggest_reservation_times(
+        self, db: Session, party_size: int, around: datetime,
+        duration_hours: int = 2, limit: int = 4
+    ) -> List[datetime]:
+        """Bookable slots on ``around``'s day with a free table for ``party_size``, nearest first.
+
+        Checks the whole slot grid against one tables query and one reservation
+        snapshot (the availability index, or a single query for that day).
+        """
+        slots = [
+            slot for slot in BusinessHours.day_slots(around.date())
+            if BusinessHours.validate_reservation_time(slot)[0]
+        ]
+        if not slots:
+            return []
+        table_ids = {
+            table_id for (table_id,) in db.query(Table.id).filter(
+                Table.status == TableStatus.available,
+                Table.is_active == True,
+                Table.capacity >= party_size
+            )
+        }
+        if not table_ids:
+            return []
+        duration = timedelta(hours=duration_hours)
+        intervals = table_availability.intervals(db, slots[0], slots[-1] + duration)
+        feasible = [slot for slot in slots if table_ids - intervals.busy_table_ids(slot, slot + duration)]
+        feasible.sort(key=lambda slot: (abs(slot - around), slot))
+        return feasible[:limit]
+
     def get_by_status(self, db: Session, status: TableStatus) -> List[Table]:
         return db.query(Table).filter(
             Table.status == status,
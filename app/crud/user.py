@@ -2,7 +2,9 @@ from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password
+from app.core.principal_cache import principal_cache
+from app.crud.pagination import keyset_page
 
 
 class CRUDUser:
@@ -16,12 +18,17 @@ class CRUDUser:
         return db.query(User).filter(User.username == username).first()
 
     def get_multi(
-        self, db: Session, skip: int = 0, limit: int = 100
+        self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[User]:
-        return db.query(User).offset(skip).limit(limit).all()
-
-    def create(self, db: Session, obj_in: UserCreate) -> User:
-        hashed_password = get_password_hash(obj_in.password)
+        query = keyset_page(db.query(User), (User.created_at, User.id), cursor)
+        if not cursor:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def create(self, db: Session, obj_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+        """``hashed_password``: already hashed by the caller (async endpoints); hashed here otherwise"""
+        if hashed_password is None:
+            hashed_password = get_password_hash(obj_in.password)
         db_obj = User(
             email=obj_in.email,
             username=obj_in.username,
@@ -39,6 +46,7 @@ class CRUDUser:
     def update(
         self, db: Session, db_obj: User, obj_in: UserUpdate
     ) -> User:
+        old_username = db_obj.username
         update_data = obj_in.dict(exclude_unset=True)
         if "password" in update_data:
             hashed_password = get_password_hash(update_data["password"])
@@ -51,22 +59,35 @@ class CRUDUser:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        principal_cache.invalidate(old_username, db_obj.username)
         return db_obj
 
     def delete(self, db: Session, id: int) -> User:
         obj = db.query(User).get(id)
         db.delete(obj)
         db.commit()
+        principal_cache.invalidate(obj.username)
         return obj
 
     def authenticate(self, db: Session, username: str, password: str) -> Optional[User]:
         user = self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
+        if new_hash:
+            user = self.store_rehashed_password(db, db_obj=user, hashed_password=new_hash)
         return user
 
+    def store_rehashed_password(self, db: Session, db_obj: User, hashed_password: str) -> User:
+        """Transparently migrate legacy pbkdf2 / outdated argon2 hashes after a successful login"""
+        db_obj.hashed_password = hashed_password
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
     def is_active(self, user: User) -> bool:
         return user.is_active
 
@@ -80,6 +101,7 @@ class CRUDUser:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        principal_cache.invalidate(db_obj.username)
         return db_obj
 
 
@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api import router as api_router
+from app.core.idempotency import add_idempotency_middleware, idempotency_store
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.core.query_stats import add_query_stats_middleware
+from app.crud.pagination import InvalidCursor
 
 # Create FastAPI app
 app = FastAPI(
@@ -22,24 +27,69 @@ app.add_middleware(
     max_age=3600,
 )
 
+# SQL count/time per request (X-DB-* headers in debug mode)
+add_query_stats_middleware(
+    app,
+    expose_headers=settings.DEBUG,
+    log_count_threshold=settings.SQL_LOG_QUERY_COUNT_THRESHOLD,
+    log_time_threshold_ms=settings.SQL_LOG_TIME_THRESHOLD_MS,
+)
+
+# Replay stored responses for retried order / item / payment POSTs carrying Idempotency-Key
+add_idempotency_middleware(app, api_prefix=settings.API_V1_STR, store=idempotency_store)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": "Invalid pagination cursor"})
+
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Run migration on startup
-import subprocess
+# Apply pending schema migrations on startup (no drop, no seed; see migrate.py).
+# Workers serialize on a Postgres advisory lock, so only one of them migrates.
 @app.on_event("startup")
 def run_migrations():
+    if not settings.RUN_MIGRATIONS_ON_STARTUP:
+        return
     try:
-        result = subprocess.run(["python", "migrate.py"], cwd="/app", capture_output=True, text=True)
-        if result.returncode == 0:
-            print("[Startup] Database migration completed.")
-        else:
-            print(f"[Startup] Migration failed: {result.stderr}")
+        from app.core.database import engine
+        from app.migrations.runner import run_migrations as apply_pending_migrations
+        applied = apply_pending_migrations(engine)
+        print(f"[Startup] Database migration completed. Applied: {applied or 'none'}")
     except Exception as e:
         print(f"[Startup] Migration error: {e}")
 
 
+@app.on_event("startup")
+def warm_table_availability():
+    """Build the availability index before the first booking request"""
+    from app.core.availability import table_availability
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        table_availability.warm(db)
+    except Exception as e:
+        print(f"[Startup] Availability index not built: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -2,8 +2,8 @@
 """
 🍽️ RestoBot API - Database Migration Script
 Run migrations for API service in Docker environment
-Run with: python -c "import sys; sys.path.insert(0, '/app'); exec(open('migrate.py').read())"
-Or: python migrate.py from /app directory
+Run with: python migrate.py [upgrade|seed|status|rollup|partitions|archive|reset] from /app directory
+Seeding only happens through the explicit `seed` / `reset` commands.
 """
 import sys
 import os
@@ -25,6 +25,12 @@ try:
     from app.models.table import Table
     from app.models.order import Order, OrderItem, Reservation
     from app.seed_data import seed_database
+    from app.core.menu_cache import bump_menu_version
+    from app.core.availability import bump_reservation_version
+    from app.crud.rollup import sales_rollup
+    from app.crud.archive import archive as archive_crud
+    from app.core.config import settings
+    from app.migrations.runner import run_migrations, pending_migrations, schema_version
 except ImportError as e:
     print(f"Import error: {e}")
     print(f"sys.path: {sys.path}")
@@ -54,52 +60,145 @@ def drop_database_tables():
     try:
         logger.info("🧹 Xóa dữ liệu cũ...")
         Base.metadata.drop_all(bind=engine)
+        schema_version.drop(bind=engine, checkfirst=True)
         logger.info("✅ Dữ liệu cũ đã được xóa")
         return True
     except Exception as e:
         logger.warning(f"⚠️ Không thể xóa dữ liệu cũ (có thể là lần chạy đầu): {e}")
         return True  # Không báo lỗi nếu tables không tồn tại
 
-def create_database_tables():
-    """Tạo tất cả tables từ SQLAlchemy models"""
+def upgrade_database():
+    """Áp dụng các migration chưa chạy (không xóa dữ liệu)"""
     try:
-        logger.info("🔨 Tạo database tables...")
-        Base.metadata.create_all(bind=engine)
-        
-        # Import seed_data and run seeding
-        sys.path.append('/app')
-        from app.seed_data import seed_database
-        
-        # Get database session and seed data
-        session = sessionmaker(bind=engine)()
+        applied = run_migrations(engine)
+        logger.info(f"✅ Schema đã cập nhật ({len(applied)} migration mới)")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Lỗi migration: {e}")
+        return False
+
+def seed(force: bool = False):
+    """Seed dữ liệu mẫu (chỉ khi database còn trống, trừ khi force)"""
+    session = sessionmaker(bind=engine)()
+    try:
+        if not force and session.query(User).first() is not None:
+            logger.info("⏭️ Database đã có dữ liệu, bỏ qua seed (dùng --force để seed lại)")
+            return True
         seed_database(session)
+        # Seeded rows bypass CRUD; bump so running workers and client ETags see the new menu / bookings
+        bump_menu_version(session)
+        bump_reservation_version(session)
+        session.commit()
+        logger.info("✅ Seed data thành công")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Lỗi seed data: {e}")
+        return False
+    finally:
+        session.close()
+
+def rollup(full: bool = False):
+    """Đưa bảng tổng hợp doanh thu về hiện tại (full: tính lại toàn bộ)"""
+    session = sessionmaker(bind=engine)()
+    try:
+        days = sales_rollup.catch_up(session, full=full)
+        if days is None:
+            logger.info("⏭️ Một worker khác đang cập nhật rollup, bỏ qua")
+        else:
+            logger.info(f"✅ Rollup đã cập nhật ({len(days)} ngày được tính lại)")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Lỗi cập nhật rollup: {e}")
+        return False
+    finally:
         session.close()
-        
-        logger.info("✅ Database tables đã được tạo và seed data thành công")
+
+def partitions():
+    """Tạo trước các partition theo tháng của bảng archive (PostgreSQL)"""
+    session = sessionmaker(bind=engine)()
+    try:
+        created = archive_crud.prepare_partitions(session, months_ahead=settings.ARCHIVE_PARTITIONS_AHEAD)
+        logger.info(f"✅ Partition archive đã sẵn sàng ({len(created)} partition mới)")
         return True
-        
     except Exception as e:
-        logger.error(f"❌ Lỗi tạo tables: {e}")
+        logger.error(f"❌ Lỗi tạo partition: {e}")
         return False
+    finally:
+        session.close()
+
+def archive():
+    """Chuyển đơn hàng / đặt bàn đã đóng cũ hơn ARCHIVE_AFTER_MONTHS tháng sang bảng archive"""
+    session = sessionmaker(bind=engine)()
+    try:
+        moved = archive_crud.archive(session)
+        if moved is None:
+            logger.info("⏭️ Một worker khác đang archive, bỏ qua")
+        else:
+            orders = sum(month["orders"] for month in moved)
+            reservations = sum(month["reservations"] for month in moved)
+            logger.info(f"✅ Đã archive {orders} đơn hàng, {reservations} đặt bàn ({len(moved)} tháng)")
+        return True
+    except Exception as e:
+        session.rollback()
+        logger.error(f"❌ Lỗi archive: {e}")
+        return False
+    finally:
+        session.close()
+
+def status():
+    """In ra các migration đang chờ"""
+    pending = pending_migrations(engine)
+    if not pending:
+        logger.info("✅ Schema is up to date")
+    for version, name, _ in pending:
+        logger.info(f"⏳ Pending migration {version}: {name}")
+    return True
+
+def main(argv=None):
+    """Main migration function
 
-def main():
-    """Main migration function"""
-    logger.info("🚀 Bắt đầu API database migration...")
+    Commands:
+        upgrade (default)  apply pending migrations
+        seed [--force]     load sample data into an empty database
+        status             list pending migrations
+        rollup [--full]    catch up the sales rollup tables (--full: rebuild every day)
+        partitions         pre-create monthly archive partitions (ARCHIVE_PARTITIONS_AHEAD months)
+        archive            move closed orders / reservations older than ARCHIVE_AFTER_MONTHS to the archive
+        reset              DROP all tables, re-create and seed (development only)
+    """
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else "upgrade"
+    logger.info(f"🚀 Bắt đầu API database migration ({command})...")
     
     # Check database connection
     if not check_database_connection():
         logger.error("❌ Migration thất bại - không thể kết nối database")
         sys.exit(1)
     
-    # Drop old tables first
-    drop_database_tables()
+    if command == "upgrade":
+        ok = upgrade_database()
+    elif command == "seed":
+        ok = upgrade_database() and seed(force="--force" in args) and rollup()
+    elif command == "status":
+        ok = status()
+    elif command == "rollup":
+        ok = upgrade_database() and rollup(full="--full" in args)
+    elif command == "partitions":
+        ok = upgrade_database() and partitions()
+    elif command == "archive":
+        ok = upgrade_database() and partitions() and archive()
+    elif command == "reset":
+        ok = drop_database_tables() and upgrade_database() and seed(force=True) and rollup(full=True)
+    else:
+        logger.error(f"❌ Unknown command: {command}")
+        print(main.__doc__)
+        sys.exit(2)
     
-    # Create tables and seed data
-    if not create_database_tables():
-        logger.error("❌ Migration thất bại - không thể tạo tables")
+    if not ok:
+        logger.error("❌ Migration thất bại")
         sys.exit(1)
     
     logger.info("🎉 API Migration hoàn thành thành công!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,24 @@
+"""
+Database migration: Archive tables for closed orders, order items and reservations
+
+On PostgreSQL the tables are range-partitioned by month; partitions are created
+by python migrate.py partitions (ahead of time) and by the archive job itself.
+"""
+from app.models.archive import OrderArchive, OrderItemArchive, ReservationArchive
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MODELS = (OrderArchive, OrderItemArchive, ReservationArchive)
+
+
+def upgrade(conn):
+    """Create the (partitioned) archive tables and their indexes"""
+    for model in ARCHIVE_MODELS:
+        model.__table__.create(bind=conn, checkfirst=True)
+        logger.info(f"Ensured table {model.__tablename__}")
+
+
+def downgrade(conn):
+    for model in reversed(ARCHIVE_MODELS):
+        model.__table__.drop(bind=conn, checkfirst=True)
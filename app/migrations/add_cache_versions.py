@@ -0,0 +1,33 @@
+"""
+Database migration: cache_versions table for cross-worker cache invalidation
+"""
+from sqlalchemy import text
+from app.models.cache_version import CacheVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMES = ("menu",)
+
+
+def seed(conn, names):
+    """Insert a version-1 row for each of ``names`` that has none"""
+    for name in names:
+        exists = conn.execute(
+            text("SELECT 1 FROM cache_versions WHERE name = :name"), {"name": name}
+        ).first()
+        if not exists:
+            conn.execute(
+                text("INSERT INTO cache_versions (name, version) VALUES (:name, 1)"), {"name": name}
+            )
+            logger.info(f"Added cache version row '{name}'")
+
+
+def upgrade(conn):
+    """Create cache_versions and seed one row per cached dataset"""
+    CacheVersion.__table__.create(bind=conn, checkfirst=True)
+    seed(conn, CACHE_NAMES)
+
+
+def downgrade(conn):
+    CacheVersion.__table__.drop(bind=conn, checkfirst=True)
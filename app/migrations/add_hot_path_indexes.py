@@ -0,0 +1,33 @@
+"""
+Database migration: Composite and partial indexes for hot-path predicates
+"""
+from app.models.order import Order, OrderItem, Reservation
+import logging
+
+logger = logging.getLogger(__name__)
+
+HOT_PATH_INDEXES = {
+    "ix_reservations_table_status_window",
+    "ix_reservations_active_table_window",
+    "ix_reservations_customer_created_at",
+    "ix_orders_status_created_at",
+    "ix_orders_table_status",
+    "ix_orders_active_table",
+    "ix_order_items_order_menu_item",
+}
+
+
+def upgrade(conn):
+    """Create the indexes declared on the models (skips ones that already exist)"""
+    for model in (Reservation, Order, OrderItem):
+        for index in model.__table__.indexes:
+            if index.name in HOT_PATH_INDEXES:
+                index.create(bind=conn, checkfirst=True)
+                logger.info(f"Ensured index {index.name}")
+
+
+def downgrade(conn):
+    for model in (Reservation, Order, OrderItem):
+        for index in model.__table__.indexes:
+            if index.name in HOT_PATH_INDEXES:
+                index.drop(bind=conn, checkfirst=True)
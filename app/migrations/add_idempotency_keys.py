@@ -0,0 +1,19 @@
+"""
+Database migration: idempotency_keys table for retried POSTs (orders, item adds, payments)
+"""
+from app.models.idempotency_key import IdempotencyKey
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    """Create idempotency_keys and its expires_at index (skips if present)"""
+    IdempotencyKey.__table__.create(bind=conn, checkfirst=True)
+    for index in IdempotencyKey.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+    logger.info("Ensured table idempotency_keys")
+
+
+def downgrade(conn):
+    IdempotencyKey.__table__.drop(bind=conn, checkfirst=True)
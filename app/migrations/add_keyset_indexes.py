@@ -0,0 +1,32 @@
+"""
+Database migration: Composite (sort key, id) indexes for keyset pagination
+"""
+from app.models.menu import MenuItem
+from app.models.order import Order, Reservation
+from app.models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+KEYSET_INDEXES = {
+    "ix_orders_created_at_id",
+    "ix_reservations_created_at_id",
+    "ix_menu_items_name_id",
+    "ix_users_created_at_id",
+}
+
+
+def upgrade(conn):
+    """Create the indexes declared on the models (skips ones that already exist)"""
+    for model in (Order, Reservation, MenuItem, User):
+        for index in model.__table__.indexes:
+            if index.name in KEYSET_INDEXES:
+                index.create(bind=conn, checkfirst=True)
+                logger.info(f"Ensured index {index.name}")
+
+
+def downgrade(conn):
+    for model in (Order, Reservation, MenuItem, User):
+        for index in model.__table__.indexes:
+            if index.name in KEYSET_INDEXES:
+                index.drop(bind=conn, checkfirst=True)
@@ -0,0 +1,44 @@
+"""
+Database migration: Normalized menu_items.search_name with a pg_trgm GIN index
+"""
+from sqlalchemy import inspect, text
+from app.core.search import normalize_search_text
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRGM_INDEX = "ix_menu_items_search_name_trgm"
+
+
+def upgrade(conn):
+    existing_columns = [col['name'] for col in inspect(conn).get_columns('menu_items')]
+    if 'search_name' not in existing_columns:
+        conn.execute(text('ALTER TABLE menu_items ADD COLUMN search_name VARCHAR'))
+
+    # Backfill in Python: unaccent() is not IMMUTABLE, so it cannot back a generated column
+    rows = conn.execute(text('SELECT id, name FROM menu_items WHERE search_name IS NULL')).fetchall()
+    for item_id, name in rows:
+        conn.execute(
+            text('UPDATE menu_items SET search_name = :search_name WHERE id = :id'),
+            {"search_name": normalize_search_text(name), "id": item_id},
+        )
+    logger.info(f"Backfilled search_name for {len(rows)} menu items")
+
+    if conn.dialect.name != "postgresql":
+        return
+    # CREATE EXTENSION needs privileges; without it LIKE still works, just unindexed
+    savepoint = conn.begin_nested()
+    try:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON menu_items USING gin (search_name gin_trgm_ops)'
+        ))
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        logger.warning(f"⚠️ Không tạo được trigram index ({e}); menu search dùng LIKE không index")
+
+
+def downgrade(conn):
+    conn.execute(text(f'DROP INDEX IF EXISTS {TRGM_INDEX}'))
+    conn.execute(text('ALTER TABLE menu_items DROP COLUMN IF EXISTS search_name'))
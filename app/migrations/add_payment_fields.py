@@ -1,29 +1,20 @@
-"""Add payment fields to orders table
-
-Revision ID: add_payment_fields
-Revises: initial
-Create Date: 2025-01-06
-
 """
-from alembic import op
-import sqlalchemy as sa
-
-
-# revision identifiers
-revision = 'add_payment_fields'
-down_revision = 'initial'
-branch_labels = None
-depends_on = None
+Database migration: Add payment fields to orders table
+"""
+from sqlalchemy import inspect, text
 
 
-def upgrade():
+def upgrade(conn):
+    existing_columns = [col['name'] for col in inspect(conn).get_columns('orders')]
     # Add payment_method column
-    op.add_column('orders', sa.Column('payment_method', sa.String(), nullable=True))
+    if 'payment_method' not in existing_columns:
+        conn.execute(text('ALTER TABLE orders ADD COLUMN payment_method VARCHAR'))
     # Add payment_date column  
-    op.add_column('orders', sa.Column('payment_date', sa.DateTime(timezone=True), nullable=True))
+    if 'payment_date' not in existing_columns:
+        conn.execute(text('ALTER TABLE orders ADD COLUMN payment_date TIMESTAMP WITH TIME ZONE'))
 
 
-def downgrade():
+def downgrade(conn):
     # Remove payment columns
-    op.drop_column('orders', 'payment_date')
-    op.drop_column('orders', 'payment_method')
\ No newline at end of file
+    conn.execute(text('ALTER TABLE orders DROP COLUMN IF EXISTS payment_date'))
+    conn.execute(text('ALTER TABLE orders DROP COLUMN IF EXISTS payment_method'))
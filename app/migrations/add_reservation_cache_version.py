@@ -0,0 +1,15 @@
+"""
+Database migration: seed the cache_versions row of the table availability index
+"""
+from sqlalchemy import text
+from app.core.availability import AVAILABILITY_CACHE_NAME
+from app.migrations.add_cache_versions import seed
+
+
+def upgrade(conn):
+    """Seed the "reservations" row so concurrent first bookings only ever UPDATE it"""
+    seed(conn, (AVAILABILITY_CACHE_NAME,))
+
+
+def downgrade(conn):
+    conn.execute(text("DELETE FROM cache_versions WHERE name = :name"), {"name": AVAILABILITY_CACHE_NAME})
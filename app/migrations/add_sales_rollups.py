@@ -0,0 +1,32 @@
+"""
+Database migration: Sales rollup tables (hourly revenue, daily quantities per menu item)
+
+Tables start empty; the first catch-up (python migrate.py rollup, or the first
+analytics request) backfills them from orders.
+"""
+from app.models.order import Order
+from app.models.rollup import MenuItemDailyRollup, RollupWatermark, SalesHourlyRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (SalesHourlyRollup, MenuItemDailyRollup, RollupWatermark)
+
+
+def upgrade(conn):
+    """Create the rollup tables and the orders.updated_at index the catch-up scans"""
+    for model in ROLLUP_MODELS:
+        model.__table__.create(bind=conn, checkfirst=True)
+        logger.info(f"Ensured table {model.__tablename__}")
+    for index in Order.__table__.indexes:
+        if index.name == "ix_orders_updated_at":
+            index.create(bind=conn, checkfirst=True)
+            logger.info(f"Ensured index {index.name}")
+
+
+def downgrade(conn):
+    for model in reversed(ROLLUP_MODELS):
+        model.__table__.drop(bind=conn, checkfirst=True)
+    for index in Order.__table__.indexes:
+        if index.name == "ix_orders_updated_at":
+            index.drop(bind=conn, checkfirst=True)
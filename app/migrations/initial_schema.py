@@ -0,0 +1,11 @@
+"""
+Database migration: Initial schema
+Creates every table/index declared on the models that does not exist yet
+"""
+from app.core.database import Base
+import app.models  # noqa: F401  (register all models on Base.metadata)
+
+
+def upgrade(conn):
+    """Create missing tables (checkfirst, safe on databases built by the old create_all boot)"""
+    Base.metadata.create_all(bind=conn)
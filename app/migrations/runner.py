@@ -0,0 +1,92 @@
+"""
+Versioned migration runner for RestoBot
+Chỉ chạy các migration chưa được áp dụng, ghi lại version trong bảng schema_version
+
+Each step is a module in app/migrations with ``upgrade(conn)``. Step 1 creates the
+current model schema on an empty database, so later steps must be idempotent
+(check the catalog or use IF NOT EXISTS) because a fresh database already has them.
+Append new steps to MIGRATIONS; never renumber or reorder applied ones.
+"""
+import logging
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.migrations import (
+    add_archive_tables, add_arrival_tracking, add_cache_versions, add_hot_path_indexes, add_idempotency_keys, add_keyset_indexes,
+    add_menu_search, add_payment_fields, add_reservation_cache_version, add_sales_rollups, initial_schema,
+    unique_order_items,
+)
+
+logger = logging.getLogger(__name__)
+
+# (version, name, upgrade)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial_schema", initial_schema.upgrade),
+    (2, "add_arrival_tracking", add_arrival_tracking.upgrade),
+    (3, "add_payment_fields", add_payment_fields.upgrade),
+    (4, "add_hot_path_indexes", add_hot_path_indexes.upgrade),
+    (5, "add_cache_versions", add_cache_versions.upgrade),
+    (6, "add_menu_search", add_menu_search.upgrade),
+    (7, "add_keyset_indexes", add_keyset_indexes.upgrade),
+    (8, "unique_order_items", unique_order_items.upgrade),
+    (9, "add_idempotency_keys", add_idempotency_keys.upgrade),
+    (10, "add_sales_rollups", add_sales_rollups.upgrade),
+    (11, "add_archive_tables", add_archive_tables.upgrade),
+    (12, "add_reservation_cache_version", add_reservation_cache_version.upgrade),
+]
+
+# Arbitrary key for pg_advisory_xact_lock; the same for every API worker
+MIGRATION_LOCK_KEY = 72_531_004
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _lock(conn: Connection) -> None:
+    """Serialize migrators; other workers block here until the holder commits"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def _applied_versions(conn: Connection) -> Set[int]:
+    if not inspect(conn).has_table(schema_version.name):
+        return set()
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[Tuple[int, str, Callable[[Connection], None]]]:
+    with engine.connect() as conn:
+        applied = _applied_versions(conn)
+    return [step for step in MIGRATIONS if step[0] not in applied]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations, one transaction per step. Returns the versions applied."""
+    applied_now: List[int] = []
+    # Fast path: an up-to-date database costs one catalog lookup and one SELECT
+    if not pending_migrations(engine):
+        logger.info("Database schema is up to date")
+        return applied_now
+
+    for version, name, upgrade in MIGRATIONS:
+        with engine.begin() as conn:
+            _lock(conn)
+            schema_version.create(bind=conn, checkfirst=True)
+            # Re-check under the lock: another worker may have applied it while we waited
+            if version in _applied_versions(conn):
+                continue
+            logger.info(f"Applying migration {version}: {name}")
+            upgrade(conn)
+            conn.execute(schema_version.insert().values(version=version, name=name))
+            applied_now.append(version)
+
+    logger.info(f"Applied migrations: {applied_now or 'none'}")
+    return applied_now
@@ -0,0 +1,56 @@
+"""
+Database migration: One order_items row per (order_id, menu_item_id)
+
+Merges duplicate lines, then makes ix_order_items_order_menu_item unique so
+CRUDOrder.add_item can upsert with ON CONFLICT (order_id, menu_item_id).
+"""
+from sqlalchemy import inspect, text
+from app.models.order import OrderItem
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "ix_order_items_order_menu_item"
+
+# Fold every duplicate group into its lowest id (quantities and line totals summed)
+_MERGE_SQL = text("""
+    UPDATE order_items SET
+        quantity = (SELECT SUM(d.quantity) FROM order_items d
+                    WHERE d.order_id = order_items.order_id AND d.menu_item_id = order_items.menu_item_id),
+        total_price = (SELECT SUM(d.total_price) FROM order_items d
+                       WHERE d.order_id = order_items.order_id AND d.menu_item_id = order_items.menu_item_id)
+    WHERE id IN (SELECT MIN(id) FROM order_items GROUP BY order_id, menu_item_id HAVING COUNT(*) > 1)
+""")
+_DELETE_DUPLICATES_SQL = text("""
+    DELETE FROM order_items
+    WHERE id NOT IN (SELECT MIN(id) FROM order_items GROUP BY order_id, menu_item_id)
+""")
+
+
+def _index(conn):
+    return next((ix for ix in inspect(conn).get_indexes("order_items") if ix["name"] == INDEX_NAME), None)
+
+
+def upgrade(conn):
+    """Merge duplicate lines and replace the plain index with a unique one (idempotent)"""
+    existing = _index(conn)
+    if existing is not None and existing.get("unique"):
+        logger.info(f"Index {INDEX_NAME} is already unique")
+        return
+
+    merged = conn.execute(_MERGE_SQL).rowcount
+    removed = conn.execute(_DELETE_DUPLICATES_SQL).rowcount
+    logger.info(f"Merged {merged} duplicate order item groups ({removed} rows removed)")
+
+    if existing is not None:
+        conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+    for index in OrderItem.__table__.indexes:
+        if index.name == INDEX_NAME:
+            index.create(bind=conn)
+            logger.info(f"Created unique index {INDEX_NAME}")
+
+
+def downgrade(conn):
+    if _index(conn) is not None:
+        conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+    conn.execute(text(f"CREATE INDEX {INDEX_NAME} ON order_items (order_id, menu_item_id)"))
@@ -3,11 +3,18 @@ from .user import User, UserRole
 from .menu import Category, MenuItem
 from .table import Table, TableStatus
 from .order import Order, OrderItem, Reservation, OrderStatus, PaymentStatus, ReservationStatus
+from .cache_version import CacheVersion
+from .idempotency_key import IdempotencyKey
+from .rollup import SalesHourlyRollup, MenuItemDailyRollup, RollupWatermark
+from .archive import OrderArchive, OrderItemArchive, ReservationArchive
 
 __all__ = [
     "User", "UserRole",
     "Category", "MenuItem",
     "Table", "TableStatus",
     "Order", "OrderItem", "Reservation",
-    "OrderStatus", "PaymentStatus", "ReservationStatus"
+    "OrderStatus", "PaymentStatus", "ReservationStatus",
+    "CacheVersion", "IdempotencyKey",
+    "SalesHourlyRollup", "MenuItemDailyRollup", "RollupWatermark",
+    "OrderArchive", "OrderItemArchive", "ReservationArchive"
 ]
\ No newline at end of file
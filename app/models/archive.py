@@ -0,0 +1,75 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index, Enum as SQLEnum
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.order import OrderStatus, PaymentStatus, ReservationStatus
+
+
+# Cold storage for closed orders / reservations older than ARCHIVE_AFTER_MONTHS (see app/crud/archive.py).
+# Same columns as the hot tables, no foreign keys. On PostgreSQL each table is range-partitioned
+# by month on its creation timestamp, so the key is part of the primary key.
+
+class OrderArchive(Base):
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_order_number", "order_number"),
+        Index("ix_orders_archive_customer_created_at", "customer_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    order_number = Column(String, nullable=False)
+    customer_id = Column(Integer, nullable=True)
+    table_id = Column(Integer, nullable=True)
+    status = Column(SQLEnum(OrderStatus), nullable=False)
+    payment_status = Column(SQLEnum(PaymentStatus), nullable=False)
+    payment_method = Column(String, nullable=True)
+    payment_date = Column(DateTime(timezone=True), nullable=True)
+    total_amount = Column(Float, nullable=False)
+    tax_amount = Column(Float, nullable=False)
+    discount_amount = Column(Float, nullable=False)
+    notes = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class OrderItemArchive(Base):
+    __tablename__ = "order_items_archive"
+    __table_args__ = (
+        Index("ix_order_items_archive_order", "order_id"),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # The parent order's created_at: items land in the same month partition as their order
+    order_created_at = Column(DateTime(timezone=True), primary_key=True)
+    order_id = Column(Integer, nullable=False)
+    menu_item_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    total_price = Column(Float, nullable=False)
+    special_instructions = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ReservationArchive(Base):
+    __tablename__ = "reservations_archive"
+    __table_args__ = (
+        Index("ix_reservations_archive_customer_created_at", "customer_id", "created_at"),
+        Index("ix_reservations_archive_datetime", "reservation_datetime"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    customer_id = Column(Integer, nullable=False)
+    table_id = Column(Integer, nullable=False)
+    reservation_datetime = Column(DateTime(timezone=True), nullable=False)
+    party_size = Column(Integer, nullable=False)
+    status = Column(SQLEnum(ReservationStatus), nullable=False)
+    special_requests = Column(Text, nullable=True)
+    notes = Column(Text, nullable=True)
+    actual_arrival_time = Column(DateTime(timezone=True), nullable=True)
+    arrival_status = Column(String(50), nullable=True)
+    estimated_end_time = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.core.database import Base
+from app.core.search import normalize_search_text
 
 
 class Category(Base):
@@ -15,11 +16,15 @@ class Category(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    menu_items = relationship("MenuItem", back_populates="category")
+    menu_items = relationship("MenuItem", back_populates="category", order_by="MenuItem.name")
 
 
 class MenuItem(Base):
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # Keyset pagination in CRUDMenuItem.get_multi: ORDER BY name, id
+        Index("ix_menu_items_name_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
@@ -30,9 +35,16 @@ class MenuItem(Base):
     is_featured = Column(Boolean, default=False)
     preparation_time = Column(Integer, nullable=True)  # in minutes
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    # Lowercase, unaccented name ("pho bo"); trigram GIN index on Postgres (see migrations/add_menu_search.py)
+    search_name = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     category = relationship("Category", back_populates="menu_items")
-    order_items = relationship("OrderItem", back_populates="menu_item")
\ No newline at end of file
+    order_items = relationship("OrderItem", back_populates="menu_item")
+
+    @validates("name")
+    def _sync_search_name(self, key, value):
+        self.search_name = normalize_search_text(value)
+        return value
\ No newline at end of file
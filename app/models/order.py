@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
+from datetime import timedelta
 
 
 class ReservationStatus(str, enum.Enum):
@@ -29,8 +30,27 @@ class PaymentStatus(str, enum.Enum):
     refunded = "refunded"
 
 
+# Partial-index predicates: only live rows are searched by availability/status checks
+ACTIVE_RESERVATION_SQL = "status IN ('pending', 'confirmed')"
+ACTIVE_ORDER_SQL = "status NOT IN ('completed', 'cancelled')"
+# Table hold assumed for a reservation (estimated_end_time = reservation_datetime + this)
+RESERVATION_DURATION = timedelta(hours=2)
+
+
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Overlap checks in CRUDTable.get_available_tables / is_table_available_at_time and TableStatusManager
+        Index("ix_reservations_table_status_window", "table_id", "status", "reservation_datetime", "estimated_end_time"),
+        Index(
+            "ix_reservations_active_table_window", "table_id", "reservation_datetime", "estimated_end_time",
+            postgresql_where=text(ACTIVE_RESERVATION_SQL), sqlite_where=text(ACTIVE_RESERVATION_SQL),
+        ),
+        # get_my_reservations_with_details: WHERE customer_id = ? ORDER BY created_at DESC
+        Index("ix_reservations_customer_created_at", "customer_id", "created_at"),
+        # Keyset pagination in get_multi_with_details: ORDER BY created_at DESC, id DESC
+        Index("ix_reservations_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -56,6 +76,20 @@ class Reservation(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Status-filtered listings ordered by created_at, dashboard counts
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Per-table active-order checks in TableStatusManager
+        Index("ix_orders_table_status", "table_id", "status"),
+        Index(
+            "ix_orders_active_table", "table_id",
+            postgresql_where=text(ACTIVE_ORDER_SQL), sqlite_where=text(ACTIVE_ORDER_SQL),
+        ),
+        # Keyset pagination in get_multi_with_details: ORDER BY created_at DESC, id DESC
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Sales rollup catch-up: orders changed since the watermark
+        Index("ix_orders_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String, unique=True, nullable=False, index=True)
@@ -80,6 +114,10 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        # One line per dish per order; conflict target of the upsert in CRUDOrder.add_item
+        Index("ix_order_items_order_menu_item", "order_id", "menu_item_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
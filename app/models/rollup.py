@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SalesHourlyRollup(Base):
+    """Order counts and revenue per restaurant-local hour (orders bucketed by created_at)"""
+    __tablename__ = "sales_hourly_rollups"
+
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)  # 0-23, restaurant timezone
+    order_count = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    completed_revenue = Column(Float, nullable=False, default=0.0)
+    paid_count = Column(Integer, nullable=False, default=0)
+    paid_revenue = Column(Float, nullable=False, default=0.0)
+
+
+class MenuItemDailyRollup(Base):
+    """Quantities sold per menu item per restaurant-local day (bestseller statuses only)"""
+    __tablename__ = "menu_item_daily_rollups"
+
+    # (day, menu_item_id) primary key serves the bestseller range scan
+    day = Column(Date, primary_key=True)
+    menu_item_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """Latest order change (created_at / updated_at) already folded into the rollups"""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -34,7 +34,7 @@ class Category(CategoryInDBBase):
 
 
 class CategoryWithItems(CategoryInDBBase):
-    menu_items: List[Any] = []  # Use Any to avoid circular reference
+    menu_items: List[MenuItemSimple] = []  # items without their category (no circular reference)
 
 
 class PaginatedCategoryResponse(BaseModel):
@@ -108,6 +108,11 @@ class MenuItem(MenuItemInDBBase):
     category: Any  # Use Any to avoid circular reference
 
 
+class MenuItemSearchResult(MenuItem):
+    """Menu item with its search relevance (0..1, higher is better)"""
+    score: float
+
+
 class MenuItemSimple(MenuItemInDBBase):
     """MenuItem without category details to avoid circular import"""
     pass
@@ -116,10 +121,11 @@ class MenuItemSimple(MenuItemInDBBase):
 # Paginated Response Schemas
 class PaginatedMenuResponse(BaseModel):
     items: List[MenuItem]
-    total: int
+    total: Optional[int]  # None with count=none
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
 
     class Config:
         orm_mode = True
@@ -130,12 +136,14 @@ try:
     # Pydantic v2
     CategoryWithItems.model_rebuild()
     MenuItem.model_rebuild()
+    MenuItemSearchResult.model_rebuild()
     PaginatedMenuResponse.model_rebuild()
 except AttributeError:
     # Pydantic v1 - use update_forward_refs()
     try:
         CategoryWithItems.update_forward_refs()
         MenuItem.update_forward_refs()
+        MenuItemSearchResult.update_forward_refs()
         PaginatedMenuResponse.update_forward_refs()
     except NameError:
         # Forward references will be resolved when all classes are defined
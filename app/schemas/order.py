@@ -2,6 +2,7 @@ from __future__ import annotations
 from pydantic import BaseModel, validator
 from typing import Optional, List, Any
 from datetime import datetime
+from enum import Enum
 from app.models.order import ReservationStatus, OrderStatus, PaymentStatus
 
 
@@ -99,6 +100,35 @@ class OrderItemUpdate(BaseModel):
         return v
 
 
+class OrderItemOp(str, Enum):
+    add = "add"                    # add quantity to the line (creates it if missing)
+    set_quantity = "set_quantity"  # set the line's quantity; 0 removes it
+    remove = "remove"              # drop the line (no-op if absent)
+
+
+class OrderItemOperation(BaseModel):
+    """One step of PATCH /orders/{order_id}/items; steps apply in list order"""
+    op: OrderItemOp
+    menu_item_id: int
+    quantity: Optional[int] = None
+    special_instructions: Optional[str] = None
+
+    @validator('quantity', always=True)
+    def validate_quantity(cls, v, values):
+        op = values.get('op')
+        if op == OrderItemOp.add:
+            if v is None:
+                return 1
+            if v <= 0:
+                raise ValueError('Quantity must be greater than 0')
+        elif op == OrderItemOp.set_quantity:
+            if v is None:
+                raise ValueError('Quantity is required for set_quantity')
+            if v < 0:
+                raise ValueError('Quantity must not be negative')
+        return v
+
+
 class OrderItemInDBBase(OrderItemBase):
     id: int
     order_id: int
@@ -224,19 +254,21 @@ class DashboardStats(BaseModel):
 # Paginated Response Schemas
 class PaginatedReservationResponse(BaseModel):
     items: List[ReservationWithDetails]
-    total: int
+    total: Optional[int]  # None with count=none
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
 
     class Config:
         orm_mode = True
 
 class PaginatedOrderResponse(BaseModel):
     items: List[OrderWithDetails]
-    total: int
+    total: Optional[int]  # None with count=none
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
 
     class Config:
         orm_mode = True
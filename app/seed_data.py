@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 from app.models.user import User, UserRole
 from app.models.menu import Category, MenuItem
 from app.models.table import Table, TableStatus
-from app.models.order import Order, OrderItem, Reservation, OrderStatus, PaymentStatus, ReservationStatus
+from app.models.order import Order, OrderItem, Reservation, OrderStatus, PaymentStatus, ReservationStatus, RESERVATION_DURATION
 from app.core.security import get_password_hash
 from datetime import datetime, timedelta
 import logging
@@ -214,7 +214,9 @@ def create_reservations(db: Session, users, tables):
     ]
     
     for res_data in reservations_data:
-        reservation = Reservation(**res_data)
+        reservation = Reservation(
+            **res_data, estimated_end_time=res_data["reservation_datetime"] + RESERVATION_DURATION
+        )
         db.add(reservation)
         reservations.append(reservation)
     
@@ -6,6 +6,7 @@ from typing import Optional, List
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from pydantic import BaseModel
+from app.core.availability import bump_reservation_version, table_availability
 from app.models.order import Reservation, ReservationStatus
 from app.models.table import Table, TableStatus
 from app.services.table_status_manager import create_table_status_manager
@@ -153,7 +154,9 @@ class CustomerArrivalTracker:
                     table.status = TableStatus.available
 
         if no_show_reservations:
+            bump_reservation_version(self.db)
             self.db.commit()
+            table_availability.apply(no_show_reservations)
             logger.info(f"Marked {len(no_show_reservations)} reservations as no-show")
 
         return no_show_reservations
@@ -2,6 +2,7 @@
 Authentication Helper for RestoBot API
 Xử lý authentication với token từ frontend React
 """
+import hashlib
 import requests
 from typing import Dict, Optional
 
@@ -89,5 +90,21 @@ def get_auth_headers_from_tracker(tracker) -> Dict[str, str]:
         return AuthHelper().get_rasa_headers()
 
 
+def get_idempotency_headers(tracker, action: str, *parts) -> Dict[str, str]:
+    """
+    Idempotency-Key cho một lượt hội thoại: cùng conversation + cùng tin nhắn + cùng thao tác
+    -> cùng key, nên API không tạo đơn / thêm món / thanh toán hai lần khi request bị gửi lại
+    """
+    turn = tracker.latest_message.get('message_id') if tracker.latest_message else None
+    if not turn:
+        # Fallback: timestamp of the latest user message identifies the turn
+        turn = next(
+            (event.get('timestamp') for event in reversed(tracker.events) if event.get('event') == 'user'),
+            len(tracker.events)
+        )
+    raw = "|".join(str(part) for part in (tracker.sender_id, turn, action, *parts))
+    return {"Idempotency-Key": f"rasa-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:48]}"}
+
+
 # Global auth helper instance
 auth_helper = AuthHelper()
\ No newline at end of file
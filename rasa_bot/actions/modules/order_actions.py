@@ -8,7 +8,9 @@ from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
 
-from .auth_helper import auth_helper, get_authenticated_user_from_tracker, get_auth_headers_from_tracker
+from .auth_helper import (
+    auth_helper, get_authenticated_user_from_tracker, get_auth_headers_from_tracker, get_idempotency_headers
+)
 
 # URL của FastAPI backend (dùng Docker internal network)
 API_BASE_URL = "http://api:8000/api/v1"
@@ -228,6 +230,8 @@ Không tìm thấy đặt bàn active của bạn.
                         
                         print(f"🔍 Debug: Final headers: {headers_with_content_type}")
                         
+                        headers_with_content_type.update(get_idempotency_headers(tracker, "create_order", item["id"], quantity))
+                        
                         create_order_response = requests.post(
                             f"{API_BASE_URL}/orders/orders/",
                             headers=headers_with_content_type,
@@ -255,20 +259,20 @@ Không tìm thấy đặt bàn active của bạn.
                             dispatcher.utter_message(text="❌ Không thể tạo đơn hàng. Vui lòng thử lại sau.")
                             return []
                     else:
-                        # Thêm món vào order hiện tại
-                        add_item_data = {
+                        # Thêm món vào order hiện tại (batch API: một transaction, trả về đơn đã cập nhật)
+                        add_item_data = [{
+                            "op": "add",
                             "menu_item_id": item["id"],
-                            "quantity": quantity,
-                            "special_instructions": ""
-                        }
+                            "quantity": quantity
+                        }]
                         
                         print(f"🔍 Debug: Adding item to existing order {current_order_id}")
                         print(f"🔍 Debug: Add item data: {add_item_data}")
                         print(f"🔍 Debug: Request headers for add item: {headers}")
                         
-                        add_item_response = requests.post(
-                            f"{API_BASE_URL}/orders/orders/{current_order_id}/items/",
-                            headers=headers,
+                        add_item_response = requests.patch(
+                            f"{API_BASE_URL}/orders/orders/{current_order_id}/items",
+                            headers={**headers, **get_idempotency_headers(tracker, "add_item", current_order_id, item["id"], quantity)},
                             json=add_item_data,
                             timeout=10
                         )
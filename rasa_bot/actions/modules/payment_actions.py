@@ -8,7 +8,9 @@ from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
 
-from .auth_helper import auth_helper, get_authenticated_user_from_tracker, get_auth_headers_from_tracker
+from .auth_helper import (
+    auth_helper, get_authenticated_user_from_tracker, get_auth_headers_from_tracker, get_idempotency_headers
+)
 
 # URL của FastAPI backend
 API_BASE_URL = "http://api:8000/api/v1"
@@ -165,7 +167,7 @@ class ActionProcessPayment(Action):
 
             response = requests.post(
                 f"{API_BASE_URL}/orders/orders/{payment_order_id}/payment",
-                headers=headers,
+                headers={**headers, **get_idempotency_headers(tracker, "payment", payment_order_id)},
                 json=payment_data,
                 timeout=10
             )